@@ -18,10 +18,15 @@ from .const import (
     CONF_MQTT_USER,
     CONF_MQTT_PASSWORD,
     CONF_SCAN_INTERVAL,
+    CONF_JSON_PAYLOADS,
+    CONF_ADAPTIVE_INTERVAL,
     CONF_DEVICE_MODEL,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_DEVICE_MODEL,
+    DEFAULT_JSON_PAYLOADS,
+    DEFAULT_ADAPTIVE_INTERVAL,
     get_mqtt_topics,
+    get_wire_format,
 )
 from .ssh_manager import SSHManager
 from .mqtt_client import UNASMQTTClient
@@ -34,6 +39,7 @@ PLATFORMS: list[Platform] = [
     Platform.SENSOR,
     Platform.SELECT,
     Platform.NUMBER,
+    Platform.TEXT,
 ]
 
 LAST_CLEANUP_VERSION_KEY = "last_cleanup_version"
@@ -260,6 +266,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     await mqtt_client_instance.async_subscribe()
+    # retained topics only hold the last published change, ask the monitor for a full snapshot
+    await mqtt_client_instance.async_request_republish()
     await _cleanup_old_mqtt_configs_on_upgrade(hass, entry)
     
     from homeassistant.components import mqtt
@@ -272,6 +280,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         qos=0,
         retain=True,
     )
+    json_payloads = entry.data.get(CONF_JSON_PAYLOADS, DEFAULT_JSON_PAYLOADS)
+    await mqtt.async_publish(
+        hass,
+        f"{topics['control']}/wire_format",
+        get_wire_format(json_payloads),
+        qos=0,
+        retain=True,
+    )
+    adaptive_interval = entry.data.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL)
+    await mqtt.async_publish(
+        hass,
+        f"{topics['control']}/adaptive_interval",
+        "on" if adaptive_interval else "off",
+        qos=0,
+        retain=True,
+    )
     
     await _migrate_mqtt_topics(hass, entry)
 
@@ -294,10 +318,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             await manager.execute_command("rm -f /root/unas_monitor.sh")
             await manager.execute_command("rm -f /root/unas_monitor.py")
             await manager.execute_command("rm -f /root/fan_control.sh")
+            await manager.execute_command("rm -f /root/fan_control.py")
             await manager.execute_command("rm -f /tmp/fan_control_last_pwm")
             await manager.execute_command("rm -f /tmp/fan_control_state")
             await manager.execute_command("rm -f /tmp/unas_hdd_temp")
             await manager.execute_command("rm -f /tmp/unas_monitor_interval")
+            await manager.execute_command("rm -f /tmp/unas_temps.json")
+            await manager.execute_command("rm -f /dev/shm/unas_temps")
+            await manager.execute_command("rm -f /tmp/unas_bay_map.json")
+            await manager.execute_command("rm -f /tmp/unas_history.bin")
+            await manager.execute_command("rm -f /root/unas_history_hours.bin")
             await manager.execute_command("systemctl daemon-reload")
             await manager.execute_command("apt remove mosquitto-clients -y")
             await manager.execute_command("pip3 uninstall paho-mqtt -y")
@@ -326,6 +356,7 @@ class UNASDataUpdateCoordinator(DataUpdateCoordinator):
         self.discovered_bays: set[str] = set()
         self.discovered_nvmes: set[str] = set()
         self.discovered_pools: set[str] = set()
+        self.discovered_interfaces: set[str] = set()
         self.sensor_add_entities = None
 
         super().__init__(
@@ -379,10 +410,16 @@ class UNASDataUpdateCoordinator(DataUpdateCoordinator):
             })
 
             if hasattr(self, "sensor_add_entities") and hasattr(self, "discovered_bays"):
-                from .sensor import _discover_and_add_drive_sensors, _discover_and_add_nvme_sensors, _discover_and_add_pool_sensors
+                from .sensor import (
+                    _discover_and_add_drive_sensors,
+                    _discover_and_add_interface_sensors,
+                    _discover_and_add_nvme_sensors,
+                    _discover_and_add_pool_sensors,
+                )
                 await _discover_and_add_drive_sensors(self, self.sensor_add_entities)
                 await _discover_and_add_nvme_sensors(self, self.sensor_add_entities)
                 await _discover_and_add_pool_sensors(self, self.sensor_add_entities)
+                await _discover_and_add_interface_sensors(self, self.sensor_add_entities)
 
         except Exception as err:
             _LOGGER.warning("SSH connection temporarily unavailable: %s", err)
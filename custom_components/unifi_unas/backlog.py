@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def series_key(series: str) -> str | None:
+    # monitor series name (topic below the root, e.g. hdd/3/temperature) -> its sensor's key
+    parts = series.split("/")
+    if len(parts) == 2:
+        return f"unas_{parts[1]}" if parts[0] == "system" else f"unas_{parts[0]}_{parts[1]}"
+    if len(parts) == 3:
+        if parts[0] == "pool":
+            return f"unas_pool{parts[1]}_{parts[2]}"
+        return f"unas_{parts[0]}_{parts[1]}_{parts[2]}"
+    return None
+
+
+def _row_start(start: Any) -> datetime:
+    # statistics rows carry their start as a timestamp since 2023.3, a datetime before
+    if isinstance(start, (int, float)):
+        return dt_util.utc_from_timestamp(start)
+    return dt_util.as_utc(start)
+
+
+async def _async_compiled_hours(
+    hass: HomeAssistant, statistic_id: str, start: datetime, end: datetime
+) -> set[datetime]:
+    from homeassistant.components.recorder import get_instance
+    from homeassistant.components.recorder.statistics import statistics_during_period
+
+    rows = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, start, end, {statistic_id}, "hour", None, {"mean"}
+    )
+    return {_row_start(row["start"]) for row in rows.get(statistic_id, [])}
+
+
+def _mean_metadata() -> dict[str, Any]:
+    # the recorder replaced has_mean with mean_type in 2025.4
+    try:
+        from homeassistant.components.recorder.models import StatisticMeanType
+    except ImportError:
+        return {"has_mean": True}
+    return {"mean_type": StatisticMeanType.ARITHMETIC}
+
+
+async def async_import_backlog(hass: HomeAssistant, entry_id: str, series: dict[str, list]) -> int:
+    """Import samples the monitor queued during a broker outage as hourly sensor statistics."""
+    if "recorder" not in hass.config.components:
+        _LOGGER.debug("Recorder not loaded, dropping %d backlog series", len(series))
+        return 0
+
+    from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+    from homeassistant.components.recorder.statistics import async_import_statistics
+    from homeassistant.util.unit_conversion import TemperatureConverter
+
+    entity_reg = er.async_get(hass)
+    # the running hour is still compiled by the recorder from live states
+    current_hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    imported = 0
+
+    for name, samples in series.items():
+        key = series_key(name)
+        entity_id = key and entity_reg.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_{key}")
+        if not entity_id:
+            continue
+
+        # sensors without a state_class have no long-term statistics, don't create orphan ones
+        registry_entry = entity_reg.async_get(entity_id)
+        if not (registry_entry and (registry_entry.capabilities or {}).get("state_class")):
+            continue
+
+        state = hass.states.get(entity_id)
+        unit = state.attributes.get("unit_of_measurement") if state else None
+
+        hours: dict = defaultdict(list)
+        for ts, value in samples:
+            start = dt_util.utc_from_timestamp(ts).replace(minute=0, second=0, microsecond=0)
+            if start >= current_hour:
+                continue
+            # samples are in the monitor's native units, statistics in the displayed one
+            if unit in (UnitOfTemperature.FAHRENHEIT, UnitOfTemperature.KELVIN):
+                value = TemperatureConverter.convert(value, UnitOfTemperature.CELSIUS, unit)
+            hours[start].append(value)
+
+        if not hours:
+            continue
+
+        # the hours at the edges of the outage were already compiled from live states. importing
+        # would replace those rows with figures over the queued samples only, so they are skipped
+        first, last = min(hours), max(hours)
+        for start in await _async_compiled_hours(hass, entity_id, first, last + timedelta(hours=1)):
+            hours.pop(start, None)
+        if not hours:
+            continue
+
+        metadata = StatisticMetaData(
+            source="recorder",
+            statistic_id=entity_id,
+            name=None,
+            unit_of_measurement=unit,
+            has_sum=False,
+            **_mean_metadata(),
+        )
+        statistics = [
+            StatisticData(
+                start=start, mean=sum(values) / len(values), min=min(values), max=max(values)
+            )
+            for start, values in sorted(hours.items())
+        ]
+        async_import_statistics(hass, metadata, statistics)
+        imported += len(statistics)
+
+    if imported:
+        _LOGGER.info("Imported %d hourly statistics from the UNAS backlog", imported)
+    return imported
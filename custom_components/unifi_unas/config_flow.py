@@ -26,9 +26,14 @@ from .const import (
     CONF_MQTT_USER,
     CONF_MQTT_PASSWORD,
     CONF_SCAN_INTERVAL,
+    CONF_JSON_PAYLOADS,
+    CONF_ADAPTIVE_INTERVAL,
     CONF_DEVICE_MODEL,
+    DEFAULT_JSON_PAYLOADS,
+    DEFAULT_ADAPTIVE_INTERVAL,
     DEVICE_MODELS,
     get_mqtt_topics,
+    get_wire_format,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -215,9 +220,27 @@ class UNASProOptionsFlow(config_entries.OptionsFlow):
                 qos=0,
                 retain=True,
             )
+            json_payloads = user_input.get(CONF_JSON_PAYLOADS, DEFAULT_JSON_PAYLOADS)
+            await mqtt.async_publish(
+                self.hass,
+                f"{topics['control']}/wire_format",
+                get_wire_format(json_payloads),
+                qos=0,
+                retain=True,
+            )
+            adaptive_interval = user_input.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL)
+            await mqtt.async_publish(
+                self.hass,
+                f"{topics['control']}/adaptive_interval",
+                "on" if adaptive_interval else "off",
+                qos=0,
+                retain=True,
+            )
 
             new_data = dict(self.config_entry.data)
             new_data[CONF_SCAN_INTERVAL] = new_interval
+            new_data[CONF_JSON_PAYLOADS] = json_payloads
+            new_data[CONF_ADAPTIVE_INTERVAL] = adaptive_interval
             self.hass.config_entries.async_update_entry(self.config_entry, data=new_data)
             await self.hass.config_entries.async_reload(self.config_entry.entry_id)
             return self.async_create_entry(title="", data={})
@@ -229,6 +252,16 @@ class UNASProOptionsFlow(config_entries.OptionsFlow):
                     default=self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
                 ): NumberSelector(
                     NumberSelectorConfig(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL, mode=NumberSelectorMode.BOX)),
+                vol.Required(
+                    CONF_JSON_PAYLOADS,
+                    default=self.config_entry.data.get(CONF_JSON_PAYLOADS, DEFAULT_JSON_PAYLOADS)
+                ): bool,
+                vol.Required(
+                    CONF_ADAPTIVE_INTERVAL,
+                    default=self.config_entry.data.get(
+                        CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL
+                    ),
+                ): bool,
             }
         )
 
@@ -7,11 +7,19 @@ CONF_MQTT_HOST = "mqtt_host"
 CONF_MQTT_USER = "mqtt_user"
 CONF_MQTT_PASSWORD = "mqtt_password"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_JSON_PAYLOADS = "json_payloads"
+CONF_ADAPTIVE_INTERVAL = "adaptive_interval"
 
 DEFAULT_USERNAME = "root"
 DEFAULT_SCAN_INTERVAL = 30
 MIN_SCAN_INTERVAL = 5
 MAX_SCAN_INTERVAL = 60
+DEFAULT_JSON_PAYLOADS = False
+DEFAULT_ADAPTIVE_INTERVAL = False
+
+
+def get_wire_format(json_payloads: bool) -> str:
+    return "json" if json_payloads else "topics"
 
 ATTR_SCRIPTS_INSTALLED = "scripts_installed"
 ATTR_SSH_CONNECTED = "ssh_connected"
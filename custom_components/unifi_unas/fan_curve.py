@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import re
+
+from homeassistant.components import mqtt
+from homeassistant.core import HomeAssistant
+
+# the fan curve is one retained document on control/fan/curve, {"points": [[temp, pwm], ...]}
+# with up to MAX_CURVE_POINTS points and increasing temperatures. its first and last point are
+# also published as the four control/fan/curve/{param} values: the number entities edit those,
+# fan_control uses them as a two-point curve when there's no document, and pid mode takes its
+# fan limits from them
+MAX_CURVE_POINTS = 10
+
+# fan curve parameter definitions: (key, name, min, max, default, unit, icon)
+FAN_CURVE_PARAMS = [
+    ("min_temp", "Min Temperature", 20, 50, 40, "°C", "mdi:thermometer-low"),
+    ("max_temp", "Max Temperature", 30, 60, 50, "°C", "mdi:thermometer-high"),
+    ("min_fan", "Min Fan Speed", 0, 100, 30, "%", "mdi:fan-speed-1"),
+    ("max_fan", "Max Fan Speed", 1, 100, 100, "%", "mdi:fan-speed-3"),
+]
+
+# per-class curves for the "weighted" fan policy on control/fan/curves/{class}, same document
+# format. these mirror fan_control's defaults, used until one is published
+DEFAULT_CLASS_CURVES = {
+    "nvme": [(55, 0), (70, 255)],
+    "cpu": [(75, 0), (90, 255)],
+}
+
+CURVE_TEXT_POINT = re.compile(r"\s*(\d+)\s*:\s*(\d+)\s*%?\s*")
+
+
+def pwm_to_percent(pwm: float) -> int:
+    return round((pwm * 100) / 255)
+
+
+def percent_to_pwm(percent: float) -> int:
+    return round((percent * 255) / 100)
+
+
+def validate_points(points: list[tuple[int, int]]) -> None:
+    if not 2 <= len(points) <= MAX_CURVE_POINTS:
+        raise ValueError(f"A fan curve needs 2 to {MAX_CURVE_POINTS} points, got {len(points)}")
+    for (t0, _), (t1, _) in zip(points, points[1:]):
+        if t1 <= t0:
+            raise ValueError(f"Fan curve temperatures must increase ({t0}°C then {t1}°C)")
+    for _, pwm in points:
+        if not 0 <= pwm <= 255:
+            raise ValueError(f"Fan curve speed out of range ({pwm} PWM)")
+
+
+def _document_points(points) -> list[tuple[int, int]] | None:
+    # the points of a received curve document, None when missing or not a usable curve
+    if points is None:
+        return None
+    try:
+        curve = [(int(temp), int(pwm)) for temp, pwm in points]
+        validate_points(curve)
+    except (ValueError, TypeError):
+        return None
+    return curve
+
+
+def get_curve(mqtt_data: dict) -> list[tuple[int, int]] | None:
+    """The active curve as [(temp, pwm), ...], the same one fan_control runs."""
+    if (curve := _document_points(mqtt_data.get("fan_curve_points"))) is not None:
+        return curve
+
+    keys = ("fan_curve_min_temp", "fan_curve_max_temp", "fan_curve_min_fan", "fan_curve_max_fan")
+    if not all(isinstance(mqtt_data.get(key), (int, float)) for key in keys):
+        return None
+    min_temp, max_temp, min_fan, max_fan = (int(mqtt_data[key]) for key in keys)
+    return [(min_temp, min_fan), (max_temp, max_fan)]
+
+
+def get_class_curve(mqtt_data: dict, fan_class: str) -> list[tuple[int, int]]:
+    curve = _document_points(mqtt_data.get(f"fan_curve_{fan_class}_points"))
+    return curve if curve is not None else DEFAULT_CLASS_CURVES[fan_class]
+
+
+def curve_pwm(points: list[tuple[int, int]], temp: float) -> float:
+    # linear between neighbouring points, flat below the first and above the last
+    if temp <= points[0][0]:
+        return points[0][1]
+    if temp >= points[-1][0]:
+        return points[-1][1]
+    for (t0, p0), (t1, p1) in zip(points, points[1:]):
+        if temp <= t1:
+            return p0 + (temp - t0) * (p1 - p0) / (t1 - t0)
+    return points[-1][1]
+
+
+def format_curve_text(points: list[tuple[int, int]]) -> str:
+    return ", ".join(f"{temp}:{pwm_to_percent(pwm)}" for temp, pwm in points)
+
+
+def parse_curve_text(text: str) -> list[tuple[int, int]]:
+    """Parse "temp:percent, temp:percent, ..." into [(temp, pwm), ...]."""
+    points = []
+    for item in text.split(","):
+        if not (m := CURVE_TEXT_POINT.fullmatch(item)):
+            raise ValueError(
+                f"Invalid fan curve point '{item.strip()}', expected temperature:percent")
+        temp, percent = int(m.group(1)), int(m.group(2))
+        if percent > 100:
+            raise ValueError(f"Fan curve speed out of range ({percent}%)")
+        points.append((temp, percent_to_pwm(percent)))
+    validate_points(points)
+    return points
+
+
+async def async_publish_curve(
+        hass: HomeAssistant,
+        control_topic: str,
+        points: list[tuple[int, int]],
+) -> None:
+    """Publish the curve document and its endpoints as the four curve parameters."""
+    validate_points(points)
+    (min_temp, min_fan), (max_temp, max_fan) = points[0], points[-1]
+    params = {"min_temp": min_temp, "max_temp": max_temp, "min_fan": min_fan, "max_fan": max_fan}
+    for key, value in params.items():
+        await mqtt.async_publish(
+            hass, f"{control_topic}/fan/curve/{key}", str(value), qos=0, retain=True)
+
+    document = json.dumps({"points": [list(point) for point in points]})
+    await mqtt.async_publish(hass, f"{control_topic}/fan/curve", document, qos=0, retain=True)
+
+
+async def async_publish_class_curve(
+    hass: HomeAssistant, control_topic: str, fan_class: str, points: list[tuple[int, int]]
+) -> None:
+    validate_points(points)
+    document = json.dumps({"points": [list(point) for point in points]})
+    await mqtt.async_publish(
+        hass, f"{control_topic}/fan/curves/{fan_class}", document, qos=0, retain=True)
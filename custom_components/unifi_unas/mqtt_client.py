@@ -8,7 +8,9 @@ from datetime import datetime
 
 from homeassistant.components import mqtt
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 
+from .backlog import async_import_backlog
 from .const import get_mqtt_root
 
 _LOGGER = logging.getLogger(__name__)
@@ -18,33 +20,69 @@ _LOGGER = logging.getLogger(__name__)
 MQTT Topic Structure Mapping:
 
 This client subscribes to unas/# and parses topics into keys for entity state.
-When adding new topics, update both the publisher (unas_monitor.py/fan_control.sh) 
+When adding new topics, update both the publisher (unas_monitor.py/fan_control.py) 
 and the corresponding handler below.
 
 Topic Pattern                        → Internal Key                   → Type
 ─────────────────────────────────────────────────────────────────────────────────
 unas/availability                    → _status                        → status
 unas/system/{metric}                 → unas_{metric}                  → value
+unas/system/cpu_cores                → unas_cpu_usage_cores           → value (JSON)
 unas/hdd/{bay}/{metric}              → unas_hdd_{bay}_{metric}        → value
 unas/nvme/{slot}/{metric}            → unas_nvme_{slot}_{metric}      → value
 unas/pool/{num}/{metric}             → unas_pool{num}_{metric}        → value
+unas/net/{iface}/{metric}            → unas_net_{iface}_{metric}      → value
 unas/smb/connections                 → unas_smb_connections           → value
 unas/smb/clients                     → unas_smb_connections           → attributes
+unas/smb/shares                      → unas_smb_connections_shares    → value (JSON)
 unas/nfs/mounts                      → unas_nfs_mounts                → value
 unas/nfs/clients                     → unas_nfs_mounts                → attributes
+unas/nfs/{rate}                      → unas_nfs_{rate}                → value
+unas/system/state                    → unas_{key}                     → JSON document
+unas/hdd/{bay}/state                 → unas_hdd_{bay}_{key}           → JSON document
+unas/nvme/{slot}/state               → unas_nvme_{slot}_{key}         → JSON document
+unas/pool/{num}/state                → unas_pool{num}_{key}           → JSON document
+unas/net/{iface}/state               → unas_net_{iface}_{key}         → JSON document
+unas/smb/state                       → unas_smb_connections(+attrs)   → JSON document
+unas/nfs/state                       → unas_nfs_mounts(+attrs)        → JSON document
+unas/diag/{timing}                   → unas_diag_{timing}             → value
+unas/fan/pid                         → unas_fan_pid_{key}             → JSON document
+unas/fan/input                       → unas_fan_input_{key}           → JSON document
+unas/diag/state                      → unas_diag_{timing}             → JSON document
+unas/backlog/{batch}                 → (imported as backdated statistics, then cleared)
 unas/control/monitor_interval        → monitor_interval               → value
+unas/control/wire_format             → wire_format                    → value
+unas/control/adaptive_interval       → adaptive_interval              → value
+unas/control/republish               → (ignored, request to the monitor)
 unas/control/fan/mode                → fan_mode                       → value
+unas/control/fan/policy              → fan_policy                     → value
+unas/control/fan/curve               → fan_curve_points               → JSON document
 unas/control/fan/curve/{param}       → fan_curve_{param}              → value
+unas/control/fan/curves/{class}      → fan_curve_{class}_points       → JSON document
+unas/control/fan/pid/{param}         → fan_pid_{param}                → value
 
 Examples:
   unas/system/cpu_temp         → unas_cpu_temp = 45
   unas/hdd/1/temperature       → unas_hdd_1_temperature = 38
   unas/nvme/0/percentage_used  → unas_nvme_0_percentage_used = 5
   unas/smb/clients             → unas_smb_connections_attributes = [{...}]
+  unas/hdd/1/state             → unas_hdd_1_temperature = 38, unas_hdd_1_model = "...", ...
+
+The */state documents are the opt-in batched wire format (control/wire_format = json), one
+retained message per group carrying the same keys as the per-metric topics.
 """
 
 
 REFRESH_DEBOUNCE_SECONDS = 0.5
+# the monitor only publishes changed values and republishes everything every 10 cycles
+# (at most 600s apart), so a key is only stale once it missed a full snapshot.
+# removed drives/pools are cleared explicitly with an empty retained payload
+STALE_DATA_SECONDS = 900
+# retained control settings, they don't change between snapshots
+PERSISTENT_KEYS = (
+    "fan_curve_", "fan_pid_", "fan_mode", "fan_policy",
+    "monitor_interval", "wire_format", "adaptive_interval",
+)
 
 
 class UNASMQTTClient:
@@ -58,6 +96,7 @@ class UNASMQTTClient:
         self._status: str = "unknown"
         self._last_update: datetime | None = None
         self._pending_refresh: asyncio.TimerHandle | None = None
+        self._state_keys: dict[str, list[str]] = {}
 
     async def async_subscribe(self) -> None:
         if mqtt.DOMAIN not in self.hass.data:
@@ -121,51 +160,121 @@ class UNASMQTTClient:
 
     def _handle_two_part(self, parts, payload):
         category, item = parts[0], parts[1]
+
+        # unas/system/state, unas/diag/state, unas/smb/state, unas/nfs/state
+        if item == "state" and category in ("system", "diag", "smb", "nfs"):
+            if category == "system":
+                self._store_state(
+                    "system",
+                    payload,
+                    lambda key: "unas_cpu_usage_cores" if key == "cpu_cores" else f"unas_{key}",
+                )
+            elif category == "diag":
+                self._store_state("diag", payload, lambda key: f"unas_diag_{key}")
+            else:
+                base = "unas_smb_connections" if category == "smb" else "unas_nfs_mounts"
+                keys = {
+                    "connections": base,
+                    "mounts": base,
+                    "clients": f"{base}_attributes",
+                    "shares": f"{base}_shares",
+                }
+                self._store_state(
+                    category, payload, lambda key: keys.get(key, f"unas_{category}_{key}")
+                )
         
+        # unas/system/cpu_cores, per-core usage list
+        elif category == "system" and item == "cpu_cores":
+            self._store_attributes("unas_cpu_usage", payload, "cores")
+
         # unas/system/<metric>
-        if category == "system":
+        elif category == "system":
             self._store_value(f"unas_{item}", payload)
         
+        # unas/backlog/<batch>, samples queued on the UNAS while the broker was down
+        elif category == "backlog":
+            if payload:
+                self.hass.async_create_task(self._async_import_backlog(item, payload))
+
+        # unas/diag/<timing>, the monitor's own collector timings
+        elif category == "diag":
+            self._store_value(f"unas_diag_{item}", payload)
+
         # unas/smb/connections or unas/smb/clients
         elif category == "smb":
             if item == "connections":
                 self._store_value("unas_smb_connections", payload)
             elif item == "clients":
                 self._store_attributes("unas_smb_connections", payload)
+            elif item == "shares":
+                self._store_attributes("unas_smb_connections", payload, "shares")
         
-        # unas/nfs/mounts or unas/nfs/clients
+        # unas/nfs/mounts, unas/nfs/clients or unas/nfs/<rate>
         elif category == "nfs":
             if item == "mounts":
                 self._store_value("unas_nfs_mounts", payload)
             elif item == "clients":
                 self._store_attributes("unas_nfs_mounts", payload)
+            else:
+                self._store_value(f"unas_nfs_{item}", payload)
         
+        # unas/fan/pid or unas/fan/input, fan_control's pid state and control temperature, cleared
+        # when leaving the modes they belong to
+        elif category == "fan" and item in ("pid", "input"):
+            self._store_state(f"fan/{item}", payload, lambda key: f"unas_fan_{item}_{key}")
+
         # unas/control/<setting>
-        elif category == "control":
+        elif category == "control" and item != "republish":
             self._store_value(item, payload)
 
     def _handle_three_part(self, parts, payload):
         category, identifier, metric = parts[0], parts[1], parts[2]
+
+        # unas/hdd/<bay>/state, unas/nvme/<slot>/state, unas/pool/<num>/state,
+        # unas/net/<iface>/state
+        if metric == "state" and category in ("hdd", "nvme", "pool", "net"):
+            if category == "pool":
+                prefix = f"unas_pool{identifier}"
+            else:
+                prefix = f"unas_{category}_{identifier}"
+            self._store_state(f"{category}/{identifier}", payload, lambda key: f"{prefix}_{key}")
         
-        # unas/hdd/<bay>/<metric> or unas/nvme/<slot>/<metric>
-        if category in ("hdd", "nvme"):
+        # unas/hdd/<bay>/<metric>, unas/nvme/<slot>/<metric> or unas/net/<iface>/<metric>
+        elif category in ("hdd", "nvme", "net"):
             self._store_value(f"unas_{category}_{identifier}_{metric}", payload)
         
         # unas/pool/<num>/<metric>
         elif category == "pool":
             self._store_value(f"unas_pool{identifier}_{metric}", payload)
         
-        # unas/control/fan/mode
-        elif category == "control" and identifier == "fan" and metric == "mode":
-            self._store_value("fan_mode", payload)
+        # unas/control/fan/mode or unas/control/fan/policy
+        elif category == "control" and identifier == "fan" and metric in ("mode", "policy"):
+            self._store_value(f"fan_{metric}", payload)
+
+        # unas/control/fan/curve, the multi-point curve document
+        elif category == "control" and identifier == "fan" and metric == "curve":
+            self._store_state("control/fan/curve", payload, lambda key: f"fan_curve_{key}")
 
     def _handle_four_part(self, parts, payload):
         if parts[0:3] == ["control", "fan", "curve"]:
             param = parts[3]
             self._store_value(f"fan_curve_{param}", payload)
+        elif parts[0:3] == ["control", "fan", "curves"]:
+            fan_class = parts[3]
+            self._store_state(
+                f"control/fan/curves/{fan_class}",
+                payload,
+                lambda key: f"fan_curve_{fan_class}_{key}",
+            )
+        elif parts[0:3] == ["control", "fan", "pid"]:
+            self._store_value(f"fan_pid_{parts[3]}", payload)
 
     def _store_value(self, key: str, payload: str) -> None:
         if not payload:
+            # retained topic cleared by the monitor, the drive/pool is gone
+            if self._data.pop(key, None) is not None:
+                self._data_timestamps.pop(key, None)
+                self._schedule_refresh()
             return
 
         value: str | int | float = payload
@@ -185,15 +294,60 @@ class UNASMQTTClient:
         self._last_update = datetime.now()
         self._schedule_refresh()
 
-    def _store_attributes(self, key: str, payload: str) -> None:
+    def _store_attributes(self, key: str, payload: str, suffix: str = "attributes") -> None:
+        if not payload:
+            return
         try:
-            self._data[f"{key}_attributes"] = json.loads(payload)
-            self._data_timestamps[f"{key}_attributes"] = datetime.now()
+            self._data[f"{key}_{suffix}"] = json.loads(payload)
+            self._data_timestamps[f"{key}_{suffix}"] = datetime.now()
             self._last_update = datetime.now()
             self._schedule_refresh()
         except json.JSONDecodeError:
             _LOGGER.warning("Failed to parse JSON attributes for %s", key)
 
+    def _store_state(self, group: str, payload: str, key_for) -> None:
+        if not payload:
+            # retained document cleared by the monitor, drop everything it carried
+            for key in self._state_keys.pop(group, []):
+                self._data.pop(key, None)
+                self._data_timestamps.pop(key, None)
+            self._schedule_refresh()
+            return
+
+        try:
+            document = json.loads(payload)
+        except json.JSONDecodeError:
+            _LOGGER.warning("Failed to parse JSON state for %s", group)
+            return
+        if not isinstance(document, dict):
+            return
+
+        now = datetime.now()
+        keys = []
+        for name, value in document.items():
+            key = key_for(name)
+            self._data[key] = value
+            self._data_timestamps[key] = now
+            keys.append(key)
+        self._state_keys[group] = keys
+        self._last_update = now
+        self._schedule_refresh()
+
+    async def _async_import_backlog(self, batch: str, payload: str) -> None:
+        try:
+            series = json.loads(payload).get("series", {})
+            await async_import_backlog(self.hass, self.entry_id, series)
+        except (json.JSONDecodeError, AttributeError):
+            _LOGGER.warning("Failed to parse backlog batch %s", batch)
+        except (HomeAssistantError, ValueError, TypeError) as err:
+            # a batch the recorder won't take would fail again on every start, drop it
+            _LOGGER.warning("Failed to import backlog batch %s: %s", batch, err)
+        finally:
+            # the batch is retained until someone takes it, that was us
+            await mqtt.async_publish(
+                self.hass, f"{self.mqtt_root}/backlog/{batch}", "", qos=1, retain=True
+            )
+
     def is_available(self) -> bool:
         if self._status == "offline":
             return False
@@ -207,6 +361,11 @@ class UNASMQTTClient:
 
         return True
 
+    async def async_request_republish(self) -> None:
+        await mqtt.async_publish(
+            self.hass, f"{self.mqtt_root}/control/republish", "1", qos=0, retain=False
+        )
+
     def get_data(self) -> dict[str, Any]:
         self._cleanup_stale_data()
         return self._data.copy()
@@ -216,10 +375,10 @@ class UNASMQTTClient:
         stale_keys = []
         
         for key, timestamp in self._data_timestamps.items():
-            if key.startswith(("fan_curve_", "fan_mode", "monitor_interval")):
+            if key.startswith(PERSISTENT_KEYS):
                 continue
             
-            if (now - timestamp).total_seconds() > 120:
+            if (now - timestamp).total_seconds() > STALE_DATA_SECONDS:
                 stale_keys.append(key)
         
         for key in stale_keys:
@@ -14,15 +14,23 @@ from homeassistant.components import mqtt
 
 from . import UNASDataUpdateCoordinator
 from .const import CONF_DEVICE_MODEL, DOMAIN, get_device_info, get_mqtt_topics
+from .fan_curve import (
+    FAN_CURVE_PARAMS,
+    async_publish_curve,
+    get_curve,
+    percent_to_pwm,
+    pwm_to_percent,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-# fan curve parameter definitions: (key, name, min, max, default, unit, icon)
-FAN_CURVE_PARAMS = [
-    ("min_temp", "Min Temperature", 20, 50, 40, "°C", "mdi:thermometer-low"),
-    ("max_temp", "Max Temperature", 30, 60, 50, "°C", "mdi:thermometer-high"),
-    ("min_fan", "Min Fan Speed", 0, 100, 30, "%", "mdi:fan-speed-1"),
-    ("max_fan", "Max Fan Speed", 1, 100, 100, "%", "mdi:fan-speed-3"),
+# pid mode parameter definitions: (key, name, min, max, step, default, unit, icon)
+# the output is limited by the curve's min/max fan speed
+PID_PARAMS = [
+    ("target_temp", "PID Target Temperature", 25, 60, 0.5, 42, "°C", "mdi:thermometer-check"),
+    ("kp", "PID Proportional Gain", 0, 100, 0.5, 20, None, "mdi:tune-variant"),
+    ("ki", "PID Integral Gain", 0, 50, 0.1, 4, None, "mdi:tune-variant"),
+    ("kd", "PID Derivative Gain", 0, 100, 0.5, 10, None, "mdi:tune-variant"),
 ]
 
 
@@ -47,6 +55,13 @@ async def async_setup_entry(
             )
         )
 
+    for key, name, min_val, max_val, step, default, unit, icon in PID_PARAMS:
+        entities.append(
+            UNASFanPIDNumber(
+                coordinator, hass, key, name, min_val, max_val, step, default, unit, icon
+            )
+        )
+
     async_add_entities(entities)
 
 
@@ -92,7 +107,7 @@ class UNASFanSpeedNumber(CoordinatorEntity, NumberEntity, RestoreEntity):
         def speed_message_received(msg):
             try:
                 pwm_value = int(msg.payload)
-                percentage = round((pwm_value * 100) / 255)
+                percentage = pwm_to_percent(pwm_value)
                 self._current_value = percentage
                 self.async_write_ha_state()
             except (ValueError, TypeError) as err:
@@ -105,6 +120,8 @@ class UNASFanSpeedNumber(CoordinatorEntity, NumberEntity, RestoreEntity):
                 self._current_mode = "unas_managed"
             elif payload == "auto":
                 self._current_mode = "auto"
+            elif payload == "pid":
+                self._current_mode = "pid"
             elif payload.isdigit():
                 self._current_mode = "set_speed"
             else:
@@ -144,7 +161,7 @@ class UNASFanSpeedNumber(CoordinatorEntity, NumberEntity, RestoreEntity):
     def icon(self) -> str:
         if self._current_mode == "unas_managed":
             return "mdi:fan-off"
-        elif self._current_mode == "auto":
+        elif self._current_mode in ("auto", "pid"):
             return "mdi:fan-auto"
         elif self._current_mode == "set_speed":
             return "mdi:fan"
@@ -155,7 +172,7 @@ class UNASFanSpeedNumber(CoordinatorEntity, NumberEntity, RestoreEntity):
             _LOGGER.warning("Cannot set fan speed - not in Set Speed mode")
             return
 
-        pwm_value = round((value * 255) / 100)
+        pwm_value = percent_to_pwm(value)
 
         await mqtt.async_publish(
             self.hass, f"{self._topics['control']}/fan/mode", str(pwm_value), qos=0, retain=True
@@ -215,7 +232,7 @@ class UNASFanCurveNumber(CoordinatorEntity, NumberEntity):
                 value = int(float(msg.payload))
                 
                 if self._is_fan_param:
-                    value = round((value * 100) / 255)
+                    value = pwm_to_percent(value)
 
                 if self._attr_native_min_value <= value <= self._attr_native_max_value:
                     self._attr_native_value = value
@@ -257,8 +274,8 @@ class UNASFanCurveNumber(CoordinatorEntity, NumberEntity):
         min_fan_pwm = mqtt_data.get("fan_curve_min_fan", 204)
         max_fan_pwm = mqtt_data.get("fan_curve_max_fan", 255)
 
-        min_fan = round((min_fan_pwm * 100) / 255) if isinstance(min_fan_pwm, (int, float)) else 80
-        max_fan = round((max_fan_pwm * 100) / 255) if isinstance(max_fan_pwm, (int, float)) else 100
+        min_fan = pwm_to_percent(min_fan_pwm) if isinstance(min_fan_pwm, (int, float)) else 80
+        max_fan = pwm_to_percent(max_fan_pwm) if isinstance(max_fan_pwm, (int, float)) else 100
 
         if self._key == "min_temp":
             min_temp = value
@@ -276,13 +293,119 @@ class UNASFanCurveNumber(CoordinatorEntity, NumberEntity):
 
         self._attr_native_value = value
         self.async_write_ha_state()
-        await self._publish_to_mqtt(value)
+
+        curve = get_curve(mqtt_data)
+        if "fan_curve_points" not in mqtt_data or curve is None:
+            await self._publish_to_mqtt(value)
+            return
+
+        # a multi-point curve is active: move its end point, dropping points outside the new range
+        (first_temp, first_pwm), (last_temp, last_pwm) = curve[0], curve[-1]
+        if self._key == "min_temp":
+            first_temp = value
+        elif self._key == "max_temp":
+            last_temp = value
+        elif self._key == "min_fan":
+            first_pwm = percent_to_pwm(value)
+        elif self._key == "max_fan":
+            last_pwm = percent_to_pwm(value)
+        inner = [(temp, pwm) for temp, pwm in curve[1:-1] if first_temp < temp < last_temp]
+        points = [(first_temp, first_pwm), *inner, (last_temp, last_pwm)]
+        await async_publish_curve(self.hass, self._topics["control"], points)
 
     async def _publish_to_mqtt(self, value: float) -> None:
         mqtt_value = value
         if self._is_fan_param:
-            mqtt_value = round((value * 255) / 100)
+            mqtt_value = percent_to_pwm(value)
 
         await mqtt.async_publish(
             self.hass, self._mqtt_topic, str(int(mqtt_value)), qos=0, retain=True
         )
+
+
+class UNASFanPIDNumber(CoordinatorEntity, NumberEntity):
+    def __init__(
+        self,
+        coordinator: UNASDataUpdateCoordinator,
+        hass: HomeAssistant,
+        key: str,
+        name: str,
+        min_val: float,
+        max_val: float,
+        step: float,
+        default: float,
+        unit: str | None,
+        icon: str,
+    ) -> None:
+        super().__init__(coordinator)
+        self.hass = hass
+        self._topics = get_mqtt_topics(coordinator.entry.entry_id)
+        self._attr_has_entity_name = True
+        self._attr_name = name
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_fan_pid_{key}"
+        self._attr_native_min_value = min_val
+        self._attr_native_max_value = max_val
+        self._attr_native_step = step
+        self._attr_native_value = None
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_mode = NumberMode.BOX
+        self._default = default
+        self._unsubscribe = None
+
+        self._mqtt_topic = f"{self._topics['control']}/fan/pid/{key}"
+
+        device_name, device_model = get_device_info(coordinator.entry.data[CONF_DEVICE_MODEL])
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.entry.entry_id)},
+            name=device_name,
+            manufacturer="Ubiquiti",
+            model=device_model,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+
+        @callback
+        def message_received(msg):
+            try:
+                value = float(msg.payload)
+                if self._attr_native_min_value <= value <= self._attr_native_max_value:
+                    self._attr_native_value = value
+                    self.async_write_ha_state()
+            except (ValueError, TypeError):
+                pass
+
+        self._unsubscribe = await mqtt.async_subscribe(
+            self.hass, self._mqtt_topic, message_received, qos=0
+        )
+
+        self.hass.loop.call_later(2.0, self._maybe_init_default)
+
+    def _maybe_init_default(self) -> None:
+        if self._attr_native_value is None:
+            self._attr_native_value = float(self._default)
+            self.hass.async_create_task(self._publish_to_mqtt(self._default))
+            self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._unsubscribe:
+            self._unsubscribe()
+        await super().async_will_remove_from_hass()
+
+    @property
+    def available(self) -> bool:
+        mqtt_available = self.coordinator.mqtt_client.is_available()
+        service_running = self.coordinator.data.get("fan_control_running", False)
+        has_value = self._attr_native_value is not None
+        return mqtt_available and service_running and has_value
+
+    async def async_set_native_value(self, value: float) -> None:
+        self._attr_native_value = value
+        self.async_write_ha_state()
+        await self._publish_to_mqtt(value)
+
+    async def _publish_to_mqtt(self, value: float) -> None:
+        await mqtt.async_publish(
+            self.hass, self._mqtt_topic, str(round(float(value), 2)), qos=0, retain=True
+        )
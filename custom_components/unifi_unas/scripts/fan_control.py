@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import mmap
+import os
+import re
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import paho.mqtt.client as mqtt  # type: ignore  # installed on UNAS, not HA
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+MQTT_HOST = "REPLACE_ME"
+MQTT_USER = "REPLACE_ME"
+MQTT_PASS = "REPLACE_ME"
+MQTT_ROOT = "REPLACE_ME"
+MQTT_SYSTEM = f"{MQTT_ROOT}/system"
+MQTT_CONTROL = f"{MQTT_ROOT}/control"
+MQTT_FAN = f"{MQTT_CONTROL}/fan"
+MQTT_FAN_STATE = f"{MQTT_ROOT}/fan"
+MQTT_CONNECT_TIMEOUT = 10
+
+HDD_DEVICES = ('sda', 'sdb', 'sdc', 'sdd', 'sde', 'sdf', 'sdg')
+
+SHARED_TEMPS_SHM = "/dev/shm/unas_temps"
+# abstract unix socket the monitor pings after every update
+FAN_CONTROL_SOCKET = "\0unas_fan_control"
+PWM_FILES = ("/sys/class/hwmon/hwmon0/pwm1", "/sys/class/hwmon/hwmon0/pwm2")
+HWMON_DIR = "/sys/class/hwmon"
+DEFAULT_MONITOR_INTERVAL = 30
+CONTROL_INTERVAL = 1
+SMART_TIMEOUT = 5
+
+# layout of SHARED_TEMPS_SHM, the same definitions are in unas_monitor.py. header: magic, version,
+# sensor count, sequence number (odd while being written), hdd collector interval (s), then the
+# CLOCK_MONOTONIC time each of SHM_CLASSES was last refreshed. followed by SHM_SLOTS sensors: class
+# index, sensor number (bay/slot), temperature
+SHM_MAGIC = b'UNAS'
+SHM_VERSION = 1
+SHM_HEADER = struct.Struct('<4sHHII3d')
+SHM_SEQ = struct.Struct('<I')
+SHM_SEQ_OFFSET = 8
+SHM_SENSOR = struct.Struct('<BBh')
+SHM_SLOTS = 32
+SHM_CLASSES = ('hdd', 'nvme', 'cpu')
+SHM_SIZE = SHM_HEADER.size + SHM_SLOTS * SHM_SENSOR.size
+SHM_READ_RETRIES = 3
+
+# state until the retained mode/curve topics arrive: hands off the fans, the UNAS keeps
+# controlling them
+DEFAULT_STATE = {
+    'mode': 'unas_managed',
+    'min_temp': 40,
+    'max_temp': 50,
+    'min_fan': 64,
+    'max_fan': 255,
+    'policy': 'max',
+}
+CURVE_PARAMS = ('min_temp', 'max_temp', 'min_fan', 'max_fan')
+# a multi-point curve arrives as one retained JSON document on control/fan/curve,
+# {"points": [[temp, pwm], ...]} with increasing temperatures; without one the curve is the two
+# points (min_temp, min_fan) - (max_temp, max_fan). either way it's turned into a table indexed
+# by whole °C
+MAX_CURVE_POINTS = 10
+CURVE_TABLE_SIZE = 101
+# which temperature drives the auto/pid modes, from the per-sensor temperatures the monitor shares:
+#   max       hottest drive
+#   mean      average of the drives
+#   second    second-hottest drive, so a single drive running hot doesn't set the pace for all
+#             of them
+#   weighted  hottest drive through the main curve (or pid), plus the NVMe and CPU temperatures
+#             through their own curves on control/fan/curves/{class}; the fans follow whichever
+#             demands the most
+POLICIES = ('max', 'mean', 'second', 'weighted')
+# until HA publishes them: off below a comfortable temperature, full speed near the throttling point
+DEFAULT_CLASS_CURVES = {
+    'nvme': [(55, 0), (70, 255)],
+    'cpu': [(75, 0), (90, 255)],
+}
+# pid mode holds the hottest drive at target_temp, with the output kept between the curve's
+# min_fan and max_fan. kp is PWM per °C of error, ki PWM per °C·minute, kd PWM per °C/minute of
+# temperature change
+DEFAULT_PID = {
+    'target_temp': 42.0,
+    'kp': 20.0,
+    'ki': 4.0,
+    'kd': 10.0,
+}
+PID_PARAMS = tuple(DEFAULT_PID)
+# drive temperatures are whole degrees that change every few samples, so the rate is measured
+# over a window
+PID_RATE_WINDOW = 60
+# output changes smaller than this are not applied, to keep the fans from hunting around
+# the setpoint
+PID_HYSTERESIS = 4
+PID_STATE_INTERVAL = 30
+FLOAT = re.compile(r'[0-9]+(?:\.[0-9]+)?')
+NUMBER = re.compile(r'[0-9]+')
+# raw value (10th column) of SMART attribute 194
+SMART_TEMPERATURE = re.compile(r'194 Temperature_Celsius(?:\s+\S+){7}\s+(\d+)')
+
+
+class HeldFile:
+    # a small file kept open and read/written in place with pread/pwrite, instead of an
+    # open/read/close (or a cat/echo fork) per access
+    def __init__(self, path, flags=os.O_RDONLY):
+        self.path = path
+        self.flags = flags
+        self.fd = None
+
+    def open(self):
+        if self.fd is None:
+            self.fd = os.open(self.path, self.flags)
+        return self.fd
+
+    def read(self):
+        try:
+            return os.pread(self.open(), 64, 0)
+        except OSError:
+            self.close()
+            raise
+
+    def write(self, data):
+        try:
+            os.pwrite(self.open(), data, 0)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+
+class SharedTemps:
+    # read side of the monitor's shared temperatures: one copy of the mapped segment per read,
+    # retried when the sequence number shows the monitor was writing meanwhile. decoded only when
+    # it changed
+    def __init__(self, path):
+        self.path = path
+        self.mm = None
+        self.seq = None
+        self.interval = 0
+        self.classes = {}
+
+    def open(self):
+        if self.mm is None:
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                self.mm = mmap.mmap(fd, SHM_SIZE, prot=mmap.PROT_READ)
+            finally:
+                os.close(fd)
+        return self.mm
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+            self.seq = None
+
+    def read(self):
+        # (hdd collector interval, {class: (monotonic time refreshed, {sensor: temperature})})
+        mm = self.open()
+        for _ in range(SHM_READ_RETRIES):
+            data = mm[:SHM_SIZE]
+            magic, version, count, seq, interval, *updated = SHM_HEADER.unpack_from(data)
+            if (magic, version) != (SHM_MAGIC, SHM_VERSION):
+                raise ValueError("unknown shared temperatures layout")
+            if seq & 1 or SHM_SEQ.unpack_from(mm, SHM_SEQ_OFFSET)[0] != seq:
+                continue
+            if seq != self.seq:
+                classes = {name: (updated[i], {}) for i, name in enumerate(SHM_CLASSES)}
+                for i in range(min(count, SHM_SLOTS)):
+                    offset = SHM_HEADER.size + i * SHM_SENSOR.size
+                    index, sensor, temp = SHM_SENSOR.unpack_from(data, offset)
+                    if index < len(SHM_CLASSES):
+                        classes[SHM_CLASSES[index]][1][str(sensor)] = temp
+                self.seq, self.interval, self.classes = seq, interval, classes
+            break
+        # still mid-write after the retries: the previous sample is at most one update old
+        return self.interval, self.classes
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class PIDController:
+    def __init__(self):
+        self.reset(0)
+
+    def reset(self, pwm):
+        # the integral starts at the current fan speed so taking over from another mode doesn't
+        # jump the fans
+        self.integral = float(pwm)
+        self.output = pwm
+        self.reference = None
+        self.rate = 0.0
+        self.last_step = None
+        self.terms = (0.0, 0.0, 0.0)
+
+    def step(self, temp, params, low, high, now):
+        error = temp - params['target_temp']
+        dt = 0 if self.last_step is None else now - self.last_step
+        self.last_step = now
+
+        # derivative on the measurement (not the error), so moving the target doesn't kick the fans
+        if self.reference is None:
+            self.reference = (temp, now)
+        elif now - self.reference[1] >= PID_RATE_WINDOW:
+            ref_temp, ref_time = self.reference
+            self.rate = (temp - ref_temp) * 60 / (now - ref_time)
+            self.reference = (temp, now)
+
+        p = params['kp'] * error
+        d = params['kd'] * self.rate
+        integral = clamp(self.integral + params['ki'] * error * dt / 60, low, high)
+        # anti-windup: stop integrating while the output is saturated in the direction the
+        # error pushes it
+        unclamped = p + integral + d
+        if not ((unclamped > high and error > 0) or (unclamped < low and error < 0)):
+            self.integral = integral
+        self.integral = clamp(self.integral, low, high)
+
+        output = int(round(clamp(p + self.integral + d, low, high)))
+        # always let the output reach the limits, even by less than the hysteresis
+        at_limit = output != self.output and output in (low, high)
+        if abs(output - self.output) >= PID_HYSTERESIS or at_limit:
+            self.output = output
+        self.output = clamp(self.output, low, high)
+        self.terms = (p, self.integral, d)
+        return error
+
+    def state(self, temp, params, error):
+        p, i, d = self.terms
+        return {
+            'target': params['target_temp'],
+            'temperature': temp,
+            'error': round(error, 1),
+            'p': round(p, 1),
+            'i': round(i, 1),
+            'd': round(d, 1),
+            'output': self.output,
+            'kp': params['kp'],
+            'ki': params['ki'],
+            'kd': params['kd'],
+        }
+
+
+def calculate_pwm(temp, points):
+    # linear between neighbouring points, flat below the first and above the last
+    if temp <= points[0][0]:
+        return points[0][1]
+    if temp >= points[-1][0]:
+        return points[-1][1]
+    for (t0, p0), (t1, p1) in zip(points, points[1:]):
+        if temp <= t1:
+            return int(p0 + (temp - t0) * (p1 - p0) / (t1 - t0))
+
+
+def build_curve_table(points):
+    return tuple(calculate_pwm(temp, points) for temp in range(CURVE_TABLE_SIZE))
+
+
+def parse_curve(payload):
+    # [(temp, pwm), ...] from a control/fan/curve document, None when it isn't a usable curve
+    try:
+        points = [(int(t), int(p)) for t, p in json.loads(payload)['points']]
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not 2 <= len(points) <= MAX_CURVE_POINTS:
+        return None
+    if any(not 0 <= p <= 255 for _, p in points):
+        return None
+    if any(t1 <= t0 for (t0, _), (t1, _) in zip(points, points[1:])):
+        return None
+    return points
+
+
+class FanControl:
+    def __init__(self):
+        # written by the MQTT thread, read by the control loop; single key assignments only
+        self.state = dict(DEFAULT_STATE)
+        self.curve_points = None
+        self.curve_table = ()
+        self.update_curve()
+        self.pid_params = dict(DEFAULT_PID)
+        self.pid = PIDController()
+        self.pid_active = False
+        self.class_tables = {
+            name: build_curve_table(points) for name, points in DEFAULT_CLASS_CURVES.items()
+        }
+        self.published_states = {}  # fan/<name> -> (document, monotonic time published)
+        self.last_published = 0
+        self.last_report = None
+        self.polling_directly = False
+
+        self.pwm_files = [HeldFile(path, os.O_RDWR) for path in PWM_FILES]
+        self.shared_temps = SharedTemps(SHARED_TEMPS_SHM)
+        self.wakeup = None
+
+        self.mqtt_connected = threading.Event()
+        self.mqtt = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.mqtt.username_pw_set(MQTT_USER, MQTT_PASS)
+        self.mqtt.on_connect = self._on_connect
+        self.mqtt.on_disconnect = self._on_disconnect
+        self.mqtt.on_message = self._on_message
+
+    def _on_connect(self, _client, _userdata, _flags, reason_code, _properties):
+        if reason_code == 0:
+            logger.info("MQTT connected")
+            # the retained mode and curve come back on every (re)subscribe
+            topics = ('mode', 'policy', 'curve', 'curve/+', 'curves/+', 'pid/+')
+            self.mqtt.subscribe([(f"{MQTT_FAN}/{topic}", 0) for topic in topics])
+            self.mqtt_connected.set()
+        else:
+            logger.error(f"MQTT failed: {reason_code}")
+
+    def _on_disconnect(self, _client, _userdata, _flags, reason_code, _properties):
+        self.mqtt_connected.clear()
+        if reason_code != 0:
+            logger.warning(f"MQTT disconnected: {reason_code}")
+
+    def _on_message(self, _client, _userdata, msg):
+        payload = msg.payload.decode(errors='replace').strip()
+        key = msg.topic.rsplit('/', 1)[-1]
+        if msg.topic == f"{MQTT_FAN}/mode":
+            # validated when applied, an unknown mode falls back to unas_managed there
+            self.state['mode'] = payload
+        elif msg.topic == f"{MQTT_FAN}/policy":
+            self.state['policy'] = payload if payload in POLICIES else 'max'
+        elif msg.topic == f"{MQTT_FAN}/curves/{key}" and key in DEFAULT_CLASS_CURVES:
+            points = parse_curve(payload) if payload else DEFAULT_CLASS_CURVES[key]
+            if points is None:
+                logger.warning(f"Ignoring invalid {key} fan curve: {payload}")
+                return
+            self.class_tables[key] = build_curve_table(points)
+        elif msg.topic == f"{MQTT_FAN}/curve":
+            # an empty (cleared) document goes back to the two-point curve
+            points = parse_curve(payload) if payload else None
+            if payload and points is None:
+                logger.warning(f"Ignoring invalid fan curve: {payload}")
+                return
+            self.curve_points = points
+            self.update_curve()
+        elif key in CURVE_PARAMS and NUMBER.fullmatch(payload):
+            self.state[key] = int(payload)
+            self.update_curve()
+        elif (
+            key in PID_PARAMS
+            and msg.topic == f"{MQTT_FAN}/pid/{key}"
+            and FLOAT.fullmatch(payload)
+        ):
+            self.pid_params[key] = float(payload)
+
+    def update_curve(self):
+        # runs on the MQTT thread, the control loop picks up the new table on its next tick
+        points = self.curve_points
+        if points is None:
+            state = self.state
+            points = [(state['min_temp'], state['min_fan']), (state['max_temp'], state['max_fan'])]
+        self.curve_table = build_curve_table(points)
+
+    def get_max_hdd_temp_fallback(self):
+        temps = []
+
+        # prefer the kernel drivetemp driver: a sysfs read per drive instead of a smartctl fork
+        try:
+            hwmons = os.listdir(HWMON_DIR)
+        except OSError:
+            hwmons = []
+        for hwmon in hwmons:
+            path = f"{HWMON_DIR}/{hwmon}"
+            try:
+                with open(f"{path}/name") as f:
+                    if f.read().strip() != 'drivetemp':
+                        continue
+                if not any(os.path.exists(f"{path}/device/block/{dev}") for dev in HDD_DEVICES):
+                    continue
+                with open(f"{path}/temp1_input") as f:
+                    temps.append(int(f.read()) // 1000)
+            except (OSError, ValueError):
+                continue
+
+        if temps:
+            return max(temps)
+
+        for dev in HDD_DEVICES:
+            if not os.path.exists(f"/dev/{dev}"):
+                continue
+            try:
+                result = subprocess.run(
+                    ['smartctl', '-A', f"/dev/{dev}"],
+                    capture_output=True,
+                    text=True,
+                    timeout=SMART_TIMEOUT,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            m = SMART_TEMPERATURE.search(result.stdout)
+            if m:
+                temps.append(int(m.group(1)))
+        return max(temps, default=0)
+
+    def get_shared_temps(self):
+        # {class: {sensor: temperature}} of the classes the monitor refreshed recently
+        try:
+            interval, classes = self.shared_temps.read()
+        except (OSError, ValueError):
+            self.shared_temps.close()
+            return {}
+
+        threshold = (interval or DEFAULT_MONITOR_INTERVAL) * 2 + 10
+        now = time.monotonic()
+        temps = {}
+        for name, (updated, sensors) in classes.items():
+            # 0 is what the monitor reports for a sensor it couldn't read
+            values = {sensor: temp for sensor, temp in sensors.items() if temp > 0}
+            if values and now - updated < threshold:
+                temps[name] = values
+        if not temps:
+            # remapped on the next read, in case the monitor recreated the segment
+            self.shared_temps.close()
+        return temps
+
+    def get_control_input(self):
+        # (temperature, description, extra pwm demand, extra demand description) for the
+        # auto/pid modes
+        policy = self.state['policy']
+        temps = self.get_shared_temps()
+        drives = temps.get('hdd')
+
+        if drives is None:
+            if not self.polling_directly:
+                logger.warning(
+                    "Shared drive temperatures missing or stale, polling HDD temps directly")
+                self.polling_directly = True
+            return self.get_max_hdd_temp_fallback(), "direct poll", 0, None
+        if self.polling_directly:
+            logger.info("Shared drive temperatures available again")
+            self.polling_directly = False
+
+        ranked = sorted(drives.values(), reverse=True)
+        if policy == 'mean':
+            temp, source = round(sum(ranked) / len(ranked)), f"mean of {len(ranked)} drives"
+        elif policy == 'second' and len(ranked) > 1:
+            temp, source = ranked[1], f"2nd hottest of {len(ranked)} drives"
+        else:
+            temp, source = ranked[0], "hottest drive"
+
+        demand, demand_source = 0, None
+        if policy == 'weighted':
+            for name, table in self.class_tables.items():
+                sensors = temps.get(name)
+                if not sensors:
+                    continue
+                sensor, hottest = max(sensors.items(), key=lambda item: item[1])
+                pwm = table[clamp(hottest, 0, len(table) - 1)]
+                if pwm > demand:
+                    demand, demand_source = pwm, f"{name} {sensor} at {hottest}°C"
+        return temp, source, demand, demand_source
+
+    def open_wakeup_socket(self):
+        # the monitor pings this after every update of the shared temperatures, so a new sample is
+        # acted on right away rather than at the next tick
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(FAN_CONTROL_SOCKET)
+        except OSError as e:
+            logger.warning(f"Sample notifications unavailable ({e}), checking once a tick")
+            sock.close()
+            return None
+        return sock
+
+    def wait_for_sample(self, timeout):
+        # True when woken by the monitor, False once the timeout passed
+        if self.wakeup is None:
+            time.sleep(timeout)
+            return False
+        self.wakeup.settimeout(timeout)
+        try:
+            self.wakeup.recv(16)
+        except TimeoutError:
+            return False
+        return True
+
+    def set_pwm(self, pwm):
+        value = str(pwm).encode()
+        for pwm_file in self.pwm_files:
+            pwm_file.write(value)
+
+    def publish_if_changed(self, pwm):
+        if pwm == self.last_published:
+            return
+        # only remember a value the broker took, a failed publish is retried on the next tick
+        info = self.mqtt.publish(f"{MQTT_SYSTEM}/fan_speed", str(pwm))
+        if info.rc == mqtt.MQTT_ERR_SUCCESS:
+            self.last_published = pwm
+
+    def read_pwm(self):
+        try:
+            return int(self.pwm_files[0].read())
+        except (OSError, ValueError):
+            return 0
+
+    def publish_state(self, name, doc):
+        # on change, and every PID_STATE_INTERVAL so HA doesn't consider it stale; None clears it
+        now = time.monotonic()
+        last = self.published_states.get(name)
+        if last is not None and doc == last[0]:
+            if doc is None or now - last[1] < PID_STATE_INTERVAL:
+                return
+        payload = json.dumps(doc) if doc else ""
+        info = self.mqtt.publish(f"{MQTT_FAN_STATE}/{name}", payload)
+        if info.rc == mqtt.MQTT_ERR_SUCCESS:
+            self.published_states[name] = (doc, now)
+
+    def set_fan_speed(self):
+        state = self.state
+        mode = state['mode']
+
+        if mode != 'pid' and self.pid_active:
+            # clears the pid sensors in HA
+            self.pid_active = False
+            self.publish_state('pid', None)
+        input_published = self.published_states.get('input', (None,))[0] is not None
+        if mode not in ('auto', 'pid') and input_published:
+            self.publish_state('input', None)
+
+        if mode == 'unas_managed':
+            # don't touch pwm values - just read and report
+            pwm = self.read_pwm()
+            report = (mode, pwm, None)
+            message = f"UNAS MANAGED MODE: {pwm} PWM ({pwm * 100 // 255}%)"
+
+        elif mode == 'auto':
+            temp, source, demand, demand_source = self.get_control_input()
+            table = self.curve_table
+            pwm = max(table[clamp(temp, 0, len(table) - 1)], demand)
+            self.set_pwm(pwm)
+            report = (mode, pwm, temp, demand_source)
+            if pwm == demand and demand_source:
+                source += f", raised by {demand_source}"
+            message = f"CUSTOM CURVE MODE: {temp}°C ({source}) → {pwm} PWM ({pwm * 100 // 255}%)"
+
+        elif mode == 'pid':
+            temp, source, demand, demand_source = self.get_control_input()
+            params = self.pid_params
+            low = min(state['min_fan'], state['max_fan'])
+            high = max(state['min_fan'], state['max_fan'])
+            if not self.pid_active:
+                self.pid.reset(clamp(self.read_pwm(), low, high))
+                self.pid_active = True
+            error = self.pid.step(temp, params, low, high, time.monotonic())
+            pwm = max(self.pid.output, demand)
+            self.set_pwm(pwm)
+            self.publish_state('pid', self.pid.state(temp, params, error))
+            report = (mode, pwm, temp, params['target_temp'], demand_source)
+            if pwm == demand and demand_source:
+                source += f", raised by {demand_source}"
+            message = (
+                f"PID MODE: {temp}°C ({source}), target {params['target_temp']}°C → "
+                f"{pwm} PWM ({pwm * 100 // 255}%)"
+            )
+
+        elif NUMBER.fullmatch(mode) and int(mode) <= 255:
+            pwm = int(mode)
+            self.set_pwm(pwm)
+            report = (mode, pwm, None)
+            message = f"SET SPEED MODE: {pwm} PWM ({pwm * 100 // 255}%)"
+
+        else:
+            logger.warning(f"Invalid mode: {mode}, defaulting to UNAS Managed")
+            state['mode'] = 'unas_managed'
+            return
+
+        if mode in ('auto', 'pid'):
+            self.publish_state('input', {
+                'policy': state['policy'],
+                'temperature': temp,
+                'source': demand_source if pwm == demand and demand_source else source,
+            })
+
+        # logged when something changes rather than every tick
+        if report != self.last_report:
+            logger.info(message)
+            self.last_report = report
+
+        self.publish_if_changed(pwm)
+
+    def run(self, service):
+        logger.info("Fan control started" + (" (service)" if service else ""))
+        # connects in the background: fan control keeps running through broker outages, with the
+        # defaults (hands off) until the retained mode/curve have been received once
+        self.mqtt.connect_async(MQTT_HOST, 1883, 60)
+        self.mqtt.loop_start()
+
+        if not service:
+            if self.mqtt_connected.wait(MQTT_CONNECT_TIMEOUT):
+                time.sleep(1)  # retained messages follow the subscribe
+            self.set_fan_speed()
+            logger.info(f"Fan control state: {self.state}")
+            self.mqtt.loop_stop()
+            return
+
+        # one tick a second off the monotonic clock, plus an extra step whenever the monitor
+        # shares a new sample; a step is a copy of the shared temperatures and a few writes on
+        # held descriptors
+        self.wakeup = self.open_wakeup_socket()
+        next_tick = time.monotonic() + CONTROL_INTERVAL
+        while True:
+            try:
+                self.set_fan_speed()
+            except OSError as e:
+                logger.error(f"Fan control error: {e}")
+
+            delay = next_tick - time.monotonic()
+            if delay > 0 and self.wait_for_sample(delay):
+                continue
+            next_tick += CONTROL_INTERVAL
+            if next_tick < time.monotonic():
+                next_tick = time.monotonic() + CONTROL_INTERVAL
+
+
+if __name__ == '__main__':
+    FanControl().run(service='--service' in sys.argv[1:])
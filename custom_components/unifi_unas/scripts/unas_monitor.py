@@ -1,9 +1,23 @@
 #!/usr/bin/env python3
 
+import os
+import math
+import asyncio
+import collections
+import contextlib
+import fcntl
 import time
 import subprocess
 import logging
 import json
+import mmap
+import struct
+import concurrent.futures
+import re
+import socket
+import threading
+from array import array
+from fnmatch import fnmatch
 from pathlib import Path
 import paho.mqtt.client as mqtt  # type: ignore  # installed on UNAS, not HA
 
@@ -19,6 +33,130 @@ MQTT_USER = "REPLACE_ME"
 MQTT_PASS = "REPLACE_ME"
 MQTT_ROOT = "REPLACE_ME"
 DEFAULT_MONITOR_INTERVAL = 30
+MQTT_CONNECT_TIMEOUT = 10
+RATE_MIN_WINDOW = 0.5  # shortest counter window (s) cpu usage / disk throughput are computed over
+# smartctl threads per drive class. the HDD and NVMe collectors run concurrently with their own
+# deadlines, so each class has its own pool and a query never queues behind the other class
+SMART_MAX_WORKERS = 8
+SMART_TIMEOUT = 10
+# consecutive failed smartctl queries (timeout, no output, bad JSON) after which a drive's cached
+# sample is dropped instead of republished, so its entities go unavailable rather than freezing on
+# old values
+SMART_MAX_FAILURES = 3
+# check the ATA power mode before touching a HDD so SMART polling never spins up an idle disk
+SMART_STANDBY_CHECK = True
+
+# every collector runs as its own task on the tick. a collector that overruns its deadline (s) is
+# reported and left to finish in the background; it is skipped on later ticks until it returns
+COLLECTOR_TIMEOUTS = {
+    'system': 5,
+    'hdd': SMART_TIMEOUT + 10,
+    'nvme': SMART_TIMEOUT + 5,
+    'pool': 10,
+    'smb': 15,
+    'nfs': 15,
+}
+# adaptive sampling (MQTT_ADAPTIVE_TOPIC = on): the user-set interval becomes a ceiling. the
+# collectors below drop to ADAPTIVE_MIN_INTERVAL while their hottest temperature climbed
+# ADAPTIVE_TEMP_RISE °C within ADAPTIVE_TREND_WINDOW (s) or a disk is at least ADAPTIVE_BUSY %
+# busy, and double their interval back towards the ceiling on every flat run. the other
+# collectors always run at the ceiling
+ADAPTIVE_COLLECTORS = ('system', 'hdd', 'nvme')
+ADAPTIVE_MIN_INTERVAL = 5
+ADAPTIVE_TEMP_RISE = 2
+ADAPTIVE_TREND_WINDOW = 300
+ADAPTIVE_BUSY = 50
+COLLECTOR_TIERS = {'pool': 'minute'}  # collectors that only run on a slower tier
+# collector, subprocess, publish and whole-cycle durations are kept over this many samples each and
+# published as p50/p95/max under MQTT_DIAG once a minute
+DIAG_WINDOW = 120
+
+# collection tiers: volatile metrics run every cycle, the rest on slower timers (seconds)
+TIER_INTERVALS = {
+    'minute': 60,  # pool capacity, SMART health/attributes of drivetemp drives
+    'hour': 3600,  # package versions, memory total, drive identity
+}
+
+# smbstatus is slow with many sessions and locks Samba's TDBs, so its result is cached and only
+# re-queried when the established SMB connections in /proc/net/tcp* change or after this long (s)
+SMB_REFRESH_INTERVAL = 300
+
+# on-device history of the metrics below (by last topic segment): every sample of the last hour,
+# 1-minute averages for a day and 1-hour min/avg/max for a year, ~160KB per series, queried over
+# MQTT_HISTORY_REQUEST. the raw/minute tiers are saved to HISTORY_FILE on tmpfs so monitor restarts
+# keep them; the hour tier is written in place to HISTORY_HOURS_FILE on flash to survive reboots
+HISTORY_RAW_SLOTS = 3600 // 5
+HISTORY_MINUTE_SLOTS = 1440
+HISTORY_HOUR_SLOTS = 8760
+HISTORY_SAVE_INTERVAL = 600
+HISTORY_METRICS = {
+    'cpu_temp', 'cpu_usage', 'memory_usage', 'fan_speed', 'disk_read', 'disk_write', 'temperature',
+    'read_speed', 'write_speed', 'read_iops', 'write_iops', 'busy', 'usage', 'ops',
+    'network_rx', 'network_tx', 'rx_speed', 'tx_speed', 'utilization',
+    'cpu_core_max', 'cpu_iowait', 'load_1m',
+    'cpu_pressure_some', 'memory_pressure_some', 'io_pressure_some',
+}
+
+# while the broker is unreachable, history samples are also queued (oldest dropped past the cap,
+# ~80 bytes each) and flushed on reconnect as retained MQTT_BACKLOG/<id> batches that HA imports
+# as backdated statistics and then clears
+BACKLOG_MAX_SAMPLES = 60000
+BACKLOG_BATCH_SAMPLES = 5000
+
+# live NFSv4 clients come from nfsd's per-client state (kernel 5.3+) rather than mountd's rmtab,
+# which never forgets a client. NFSv3 has no per-client state, showmount is only asked (once a
+# minute) while v3 calls are actually coming in
+NFSD_CLIENTS_DIR = "/proc/fs/nfsd/clients"
+NFSD_STATS_FILE = "/proc/net/rpc/nfsd"
+# READ/WRITE positions in the proc3 row (RFC 1813 procedure numbers) and proc4ops row (op numbers)
+NFS3_READ, NFS3_WRITE = 6, 7
+NFS4_OP_READ, NFS4_OP_WRITE = 25, 38
+
+# only changed values are published; everything is republished every FULL_PUBLISH_CYCLES monitor
+# intervals, on reconnect and when HA asks on MQTT_REPUBLISH_TOPIC
+FULL_PUBLISH_CYCLES = 10
+# numeric metrics (by last topic segment) only republish once they moved by at least this much.
+# uptime has none on purpose, it doubles as the per-cycle heartbeat of HA's availability check
+PUBLISH_DEADBANDS = {
+    'cpu_usage': 1,
+    'cpu_core_max': 1,
+    'cpu_iowait': 0.5,
+    'cpu_softirq': 0.5,
+    'load_1m': 0.05,
+    'load_5m': 0.05,
+    'load_15m': 0.05,
+    'cpu_pressure_some': 0.5,
+    'memory_pressure_some': 0.5,
+    'memory_pressure_full': 0.5,
+    'io_pressure_some': 0.5,
+    'io_pressure_full': 0.5,
+    'memory_used': 8,
+    'memory_usage': 0.5,
+    'disk_read': 0.1,
+    'disk_write': 0.1,
+    'network_rx': 0.1,
+    'network_tx': 0.1,
+    'rx_speed': 0.1,
+    'tx_speed': 0.1,
+    'rx_packets': 1,
+    'tx_packets': 1,
+    'utilization': 0.5,
+    'read_speed': 0.1,
+    'write_speed': 0.1,
+    'read_iops': 1,
+    'read_ops': 1,
+    'write_ops': 1,
+    'ops': 1,
+    'write_iops': 1,
+    'busy': 1,
+    'queue_depth': 0.05,
+    'read_latency': 0.5,
+    'write_latency': 0.5,
+}
+# "topics" publishes one retained topic per metric, "json" one retained <group>/state document per
+# system/drive/pool/share group. HA picks the format on MQTT_WIRE_FORMAT_TOPIC
+WIRE_FORMATS = ('topics', 'json')
+DEFAULT_WIRE_FORMAT = 'topics'
 MQTT_AVAILABILITY = f"{MQTT_ROOT}/availability"
 MQTT_SYSTEM = f"{MQTT_ROOT}/system"
 MQTT_HDD = f"{MQTT_ROOT}/hdd"
@@ -26,10 +164,76 @@ MQTT_NVME = f"{MQTT_ROOT}/nvme"
 MQTT_POOL = f"{MQTT_ROOT}/pool"
 MQTT_SMB = f"{MQTT_ROOT}/smb"
 MQTT_NFS = f"{MQTT_ROOT}/nfs"
+MQTT_NET = f"{MQTT_ROOT}/net"
+MQTT_DIAG = f"{MQTT_ROOT}/diag"
+MQTT_BACKLOG = f"{MQTT_ROOT}/backlog"
 MQTT_CONTROL = f"{MQTT_ROOT}/control"
 MONITOR_INTERVAL_TOPIC = f"{MQTT_CONTROL}/monitor_interval"
-SHARED_TEMP_FILE = "/tmp/unas_hdd_temp"
-MONITOR_INTERVAL_FILE = "/tmp/unas_monitor_interval"
+MQTT_REPUBLISH_TOPIC = f"{MQTT_CONTROL}/republish"
+MQTT_WIRE_FORMAT_TOPIC = f"{MQTT_CONTROL}/wire_format"
+MQTT_ADAPTIVE_TOPIC = f"{MQTT_CONTROL}/adaptive_interval"
+MQTT_HISTORY_REQUEST = f"{MQTT_CONTROL}/history/request"
+MQTT_HISTORY_RESPONSE = f"{MQTT_ROOT}/history/response"
+SHARED_TEMPS_SHM = "/dev/shm/unas_temps"
+# abstract unix socket, pinged after every shared temps update
+FAN_CONTROL_SOCKET = "\0unas_fan_control"
+BAY_MAP_FILE = "/tmp/unas_bay_map.json"
+# static drive facts kept per bay in the bay map, to publish disks that sleep through a restart
+BAY_IDENTITY_KEYS = ('serial', 'model', 'firmware', 'total_size', 'rpm')
+HISTORY_FILE = "/tmp/unas_history.bin"
+HISTORY_HOURS_FILE = "/root/unas_history_hours.bin"
+DPKG_STATUS_FILE = "/var/lib/dpkg/status"
+SYS_CLASS_NET = "/sys/class/net"
+NETLINK_KOBJECT_UEVENT = 15
+# uevent socket errors in a row after which the watcher gives up and drives are found by scanning
+# /dev. it backs off 0.1s, 0.2s, 0.4s ... between attempts
+HOTPLUG_MAX_ERRORS = 8
+HDIO_DRIVE_CMD = 0x031f
+ATA_CHECK_POWER_MODE = 0xe5
+DRIVE_NAME = re.compile(r'^(sd[a-z]|nvme\d+n1)$')
+
+# layout of SHARED_TEMPS_SHM, the same definitions are in fan_control.py. header: magic, version,
+# sensor count, sequence number (odd while being written), hdd collector interval (s), then the
+# CLOCK_MONOTONIC time each of SHM_CLASSES was last refreshed. followed by SHM_SLOTS sensors: class
+# index, sensor number (bay/slot), temperature
+SHM_MAGIC = b'UNAS'
+SHM_VERSION = 1
+SHM_HEADER = struct.Struct('<4sHHII3d')
+SHM_SEQ = struct.Struct('<I')
+SHM_SEQ_OFFSET = 8
+SHM_SENSOR = struct.Struct('<BBh')
+SHM_SLOTS = 32
+SHM_CLASSES = ('hdd', 'nvme', 'cpu')
+SHM_SIZE = SHM_HEADER.size + SHM_SLOTS * SHM_SENSOR.size
+HISTORY_HOUR_RECORD = struct.Struct('<Ifff')  # epoch hour, min, avg, max
+
+# byte patterns run straight over the ProcFile buffers, pulling out only the fields the monitor uses
+UPTIME_SECONDS = re.compile(rb'\d+')
+MEMINFO_TOTAL = re.compile(rb'^MemTotal: +(\d+)', re.M)
+MEMINFO_AVAILABLE = re.compile(rb'^MemAvailable: +(\d+)', re.M)
+# aggregate and per-core rows: user nice system idle iowait irq softirq steal
+# (guest time is already in user)
+PROC_STAT_CPUS = re.compile(rb'^cpu(\d*) +(\d+) (\d+) (\d+) (\d+) (\d+) (\d+) (\d+) (\d+)', re.M)
+LOADAVG = re.compile(rb'^([\d.]+) ([\d.]+) ([\d.]+)')
+PSI_AVG10 = re.compile(rb'^(some|full) avg10=([\d.]+)', re.M)
+# remote endpoint of established (st 01) connections to local port 445
+SMB_TCP_PEER = re.compile(rb'^ *\d+: [0-9A-F]+:01BD ([0-9A-F]+:[0-9A-F]{4}) 01 ', re.M)
+NFSD_IO = re.compile(rb'^io (\d+) (\d+)', re.M)
+NFSD_RPC = re.compile(rb'^rpc (\d+)', re.M)
+NFSD_PROC3 = re.compile(rb'^proc3 \d+ ([\d ]+)', re.M)
+NFSD_PROC4OPS = re.compile(rb'^proc4ops \d+ ([\d ]+)', re.M)
+# per interface: rx bytes, packets, errs, drop, (fifo frame compressed multicast),
+# tx bytes, packets, errs, drop
+NET_DEV_IFACE = re.compile(
+    rb'^ *([^\s:]+): *(\d+) +(\d+) +(\d+) +(\d+) +\d+ +\d+ +\d+ +\d+'
+    rb' +(\d+) +(\d+) +(\d+) +(\d+)',
+    re.M,
+)
+DISKSTATS_DRIVE = re.compile(
+    rb'^ *\d+ +\d+ (sd[a-z]|nvme\d+n1) '
+    rb'(\d+) \d+ (\d+) (\d+) (\d+) \d+ (\d+) (\d+) \d+ (\d+) (\d+)',
+    re.M,
+)
 
 DEVICE_MODEL = "UNAS_PRO"
 
@@ -84,8 +288,592 @@ BAY_MAPPINGS = {
 ATA_TO_BAY = BAY_MAPPINGS.get(DEVICE_MODEL)
 
 
+class ProcFile:
+    # a /proc or /sys file held open and re-read in place: one pread into a reused buffer per
+    # sample instead of open/read/close and a fresh str per line
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.fd = None
+        self.buf = bytearray(size)
+        self.size = 0
+
+    def read(self):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY)
+        try:
+            while True:
+                self.size = os.preadv(self.fd, [self.buf], 0)
+                if self.size < len(self.buf):
+                    return self
+                # the file outgrew the buffer (more drives, more cores), grow it and read again
+                self.buf = bytearray(len(self.buf) * 2)
+        except OSError:
+            self.close()
+            raise
+
+    def value(self):
+        # single-number sysfs attribute
+        return int(self.read().buf[:self.size])
+
+    def search(self, pattern):
+        return pattern.search(self.buf, 0, self.size)
+
+    def finditer(self, pattern):
+        return pattern.finditer(self.buf, 0, self.size)
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+
+class Timings:
+    # rolling duration samples per name, recorded from the collector threads
+    def __init__(self, window):
+        self.window = window
+        self.samples = {}  # name -> deque of seconds
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.samples.setdefault(name, collections.deque(maxlen=self.window)).append(seconds)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - started)
+
+    @staticmethod
+    def percentile(ordered, p):
+        # nearest rank
+        return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+    def summary(self):
+        # name -> (p50, p95, max) in ms
+        with self.lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+        return {
+            name: tuple(round(v * 1000, 1) for v in (
+                self.percentile(ordered, 0.5), self.percentile(ordered, 0.95), ordered[-1]
+            ))
+            for name, ordered in snapshot.items()
+        }
+
+
+class HistorySeries:
+    # fixed-size rings. minute/hour slots are addressed by time and always hold the running figure
+    # of their period, so nothing needs flushing when a period ends
+    ARRAYS = ('raw_t', 'raw_v', 'minute_t', 'minute_v')  # the tiers saved to HISTORY_FILE
+
+    def __init__(self):
+        self.raw_t = array('I', [0]) * HISTORY_RAW_SLOTS  # epoch seconds
+        self.raw_v = array('f', [math.nan]) * HISTORY_RAW_SLOTS
+        self.raw_i = 0
+        self.minute_t = array('I', [0]) * HISTORY_MINUTE_SLOTS  # epoch minutes
+        self.minute_v = array('f', [math.nan]) * HISTORY_MINUTE_SLOTS
+        self.hour_t = array('I', [0]) * HISTORY_HOUR_SLOTS  # epoch hours
+        self.hour_min = array('f', [math.nan]) * HISTORY_HOUR_SLOTS
+        self.hour_avg = array('f', [math.nan]) * HISTORY_HOUR_SLOTS
+        self.hour_max = array('f', [math.nan]) * HISTORY_HOUR_SLOTS
+        self.minute_acc = [0, 0.0, 0]  # minute, sum, count
+        self.hour_acc = [0, 0.0, 0, 0.0, 0.0]  # hour, sum, count, min, max
+
+    def add(self, ts, value):
+        self.raw_t[self.raw_i] = ts
+        self.raw_v[self.raw_i] = value
+        self.raw_i = (self.raw_i + 1) % HISTORY_RAW_SLOTS
+
+        minute = ts // 60
+        if self.minute_acc[0] != minute:
+            self.minute_acc = [minute, 0.0, 0]
+        acc = self.minute_acc
+        acc[1] += value
+        acc[2] += 1
+        slot = minute % HISTORY_MINUTE_SLOTS
+        self.minute_t[slot] = minute
+        self.minute_v[slot] = acc[1] / acc[2]
+
+        hour = ts // 3600
+        if self.hour_acc[0] != hour:
+            self.hour_acc = [hour, 0.0, 0, value, value]
+        acc = self.hour_acc
+        acc[1] += value
+        acc[2] += 1
+        acc[3] = min(acc[3], value)
+        acc[4] = max(acc[4], value)
+        slot = hour % HISTORY_HOUR_SLOTS
+        self.hour_t[slot] = hour
+        self.hour_min[slot] = acc[3]
+        self.hour_avg[slot] = acc[1] / acc[2]
+        self.hour_max[slot] = acc[4]
+
+    def resume(self, ts):
+        # after a load, carry on with the running minute and hour instead of restarting their slots.
+        # the sample count comes from the raw tier; when no raw samples are left, the saved figure
+        # counts as one sample
+        minute, hour = ts // 60, ts // 3600
+        slot = minute % HISTORY_MINUTE_SLOTS
+        if self.minute_t[slot] == minute and not math.isnan(self.minute_v[slot]):
+            count = sum(1 for t in self.raw_t if t and t // 60 == minute) or 1
+            self.minute_acc = [minute, self.minute_v[slot] * count, count]
+
+        slot = hour % HISTORY_HOUR_SLOTS
+        if self.hour_t[slot] == hour and not math.isnan(self.hour_avg[slot]):
+            count = sum(1 for t in self.raw_t if t and t // 3600 == hour) or 1
+            self.hour_acc = [
+                hour, self.hour_avg[slot] * count, count, self.hour_min[slot], self.hour_max[slot]
+            ]
+
+    def query(self, tier, start, end):
+        # columnar: {'t': [...], 'v': [...]} or {'t', 'min', 'avg', 'max'} for the hour tier
+        if tier == 'raw':
+            period, stamps, columns = 1, self.raw_t, {'v': self.raw_v}
+        elif tier == 'minute':
+            period, stamps, columns = 60, self.minute_t, {'v': self.minute_v}
+        else:
+            period, stamps = 3600, self.hour_t
+            columns = {'min': self.hour_min, 'avg': self.hour_avg, 'max': self.hour_max}
+
+        slots = sorted(
+            (
+                i for i, stamp in enumerate(stamps)
+                if stamp and start < (stamp + 1) * period and stamp * period <= end
+            ),
+            key=lambda i: stamps[i]
+        )
+        result = {'t': [stamps[i] * period for i in slots]}
+        for name, values in columns.items():
+            result[name] = [round(values[i], 2) for i in slots]
+        return result
+
+
+class HistoryStore:
+    def __init__(self):
+        self.series = {}  # series name (topic below the root) -> HistorySeries
+        self.lock = threading.Lock()
+        self.hour_layout = None  # series names in the order the hours file holds them
+        self.hour_offset = 0  # where the hours file's slots start
+        self.hours_saved = 0  # epoch hour the hours file was last written up to
+
+    def record(self, name, value, ts):
+        series = self.series.get(name)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(name, HistorySeries())
+        series.add(ts, value)
+
+    def query(self, pattern, tier, start, end):
+        with self.lock:
+            names = sorted(name for name in self.series if fnmatch(name, pattern))
+        return {name: self.series[name].query(tier, start, end) for name in names}
+
+    def save(self, path, hours_path):
+        with self.lock:
+            items = list(self.series.items())
+        self.save_recent(path, items)
+        self.save_hours(hours_path, items)
+
+    def save_recent(self, path, items):
+        # JSON header line, then every series' raw/minute arrays back to back in header order
+        header = {
+            'slots': [HISTORY_RAW_SLOTS, HISTORY_MINUTE_SLOTS],
+            'series': [[name, series.raw_i] for name, series in items],
+        }
+        try:
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(json.dumps(header).encode() + b'\n')
+                for _, series in items:
+                    for name in HistorySeries.ARRAYS:
+                        getattr(series, name).tofile(f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not save history: {e}")
+
+    @staticmethod
+    def hour_block(items, slot):
+        return b''.join(
+            HISTORY_HOUR_RECORD.pack(
+                s.hour_t[slot], s.hour_min[slot], s.hour_avg[slot], s.hour_max[slot]
+            )
+            for _, s in items
+        )
+
+    def save_hours(self, path, items):
+        # JSON header line, then the hour slots in order, each one record per series in header
+        # order. one hour of every series is one contiguous block, so a save only rewrites the
+        # blocks of the hours since the last one in place (a page or two of flash). the whole
+        # file is written when the series changed
+        names = [name for name, _ in items]
+        hour = int(time.time()) // 3600
+        try:
+            if names != self.hour_layout:
+                header = json.dumps({'slots': HISTORY_HOUR_SLOTS, 'series': names}).encode() + b'\n'
+                with open(f"{path}.tmp", 'wb') as f:
+                    f.write(header)
+                    for slot in range(HISTORY_HOUR_SLOTS):
+                        f.write(self.hour_block(items, slot))
+                os.replace(f"{path}.tmp", path)
+                self.hour_layout, self.hour_offset = names, len(header)
+            else:
+                block_size = len(items) * HISTORY_HOUR_RECORD.size
+                with open(path, 'r+b') as f:
+                    for h in range(max(self.hours_saved, hour - HISTORY_HOUR_SLOTS + 1), hour + 1):
+                        f.seek(self.hour_offset + (h % HISTORY_HOUR_SLOTS) * block_size)
+                        f.write(self.hour_block(items, h % HISTORY_HOUR_SLOTS))
+            # the running hour is written again next time
+            self.hours_saved = hour
+        except OSError as e:
+            self.hour_layout = None
+            logger.warning(f"Could not save hourly history: {e}")
+
+    def load(self, path, hours_path):
+        # the hour tier first, so the series keep the order of the hours file and it isn't rewritten
+        self.load_hours(hours_path)
+        self.load_recent(path)
+        now = int(time.time())
+        for series in self.series.values():
+            series.resume(now)
+        if self.series:
+            logger.info(f"History loaded: {len(self.series)} series")
+
+    def load_hours(self, path):
+        try:
+            with open(path, 'rb') as f:
+                header_line = f.readline()
+                header = json.loads(header_line)
+                if header.get('slots') != HISTORY_HOUR_SLOTS:
+                    return
+                names = header['series']
+                data = f.read()
+            if len(data) != HISTORY_HOUR_SLOTS * len(names) * HISTORY_HOUR_RECORD.size:
+                raise ValueError("truncated file")
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding unreadable hourly history: {e}")
+            return
+
+        series = [self.series.setdefault(name, HistorySeries()) for name in names]
+        for i, (hour, low, avg, high) in enumerate(HISTORY_HOUR_RECORD.iter_unpack(data)):
+            slot, index = divmod(i, len(names))
+            s = series[index]
+            s.hour_t[slot], s.hour_min[slot] = hour, low
+            s.hour_avg[slot], s.hour_max[slot] = avg, high
+        self.hour_layout, self.hour_offset = names, len(header_line)
+        self.hours_saved = int(time.time()) // 3600
+
+    def load_recent(self, path):
+        loaded = {}
+        template = HistorySeries()
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('slots') != [HISTORY_RAW_SLOTS, HISTORY_MINUTE_SLOTS]:
+                    return
+                for name, raw_i in header['series']:
+                    arrays = {}
+                    for attr in HistorySeries.ARRAYS:
+                        values = array(getattr(template, attr).typecode)
+                        values.fromfile(f, len(getattr(template, attr)))
+                        arrays[attr] = values
+                    loaded[name] = (raw_i, arrays)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, EOFError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding unreadable history: {e}")
+            return
+
+        for name, (raw_i, arrays) in loaded.items():
+            series = self.series.setdefault(name, HistorySeries())
+            series.raw_i = raw_i
+            for attr, values in arrays.items():
+                setattr(series, attr, values)
+
+
+class DriveTempReader:
+    # HDD temperatures from the kernel drivetemp driver: one pread on a held-open
+    # hwmon temp1_input per drive instead of forking smartctl
+    def __init__(self):
+        self.fds = {}  # device -> fd of its hwmon temp1_input
+        self.devices = None  # drive set the fds were resolved for
+
+    def __contains__(self, device):
+        return device in self.fds
+
+    def refresh(self, devices):
+        self.close()
+        self.devices = set(devices)
+        for hwmon in Path('/sys/class/hwmon').glob('hwmon*'):
+            try:
+                if (hwmon / 'name').read_text().strip() != 'drivetemp':
+                    continue
+                for block in (hwmon / 'device' / 'block').iterdir():
+                    if block.name in devices:
+                        self.fds[block.name] = os.open(hwmon / 'temp1_input', os.O_RDONLY)
+            except OSError:
+                continue
+
+        if self.fds:
+            logger.info(f"drivetemp available for {', '.join(sorted(self.fds))}")
+
+    def read(self, device):
+        fd = self.fds.get(device)
+        if fd is None:
+            return None
+        try:
+            return int(os.pread(fd, 16, 0)) // 1000
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        for fd in self.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+
+
+class HotplugWatcher(threading.Thread):
+    # kernel uevents over netlink, so drive insertion/removal is seen the moment it happens instead
+    # of at the next /dev scan. events are handed to the event loop through the deliver callback.
+    # the socket is bound right away, the kernel queues events until the thread is started
+    def __init__(self, deliver):
+        super().__init__(name='hotplug', daemon=True)
+        self.deliver = deliver
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        self.sock.bind((0, 1))  # multicast group 1: kernel uevents
+
+    def run(self):
+        errors = 0
+        while True:
+            try:
+                msg = self.sock.recv(16384)
+            except OSError as e:
+                errors += 1
+                if errors >= HOTPLUG_MAX_ERRORS:
+                    logger.error(
+                        f"uevent socket keeps failing ({e}), scanning /dev every cycle instead"
+                    )
+                    self.sock.close()
+                    self.deliver(('disable', None))
+                    return
+                # ENOBUFS means events were dropped, resync the device index from /dev
+                logger.warning(f"uevent socket error ({e}), rescanning drives")
+                self.deliver(('rescan', None))
+                time.sleep(0.1 * 2 ** (errors - 1))
+                continue
+            errors = 0
+
+            fields = {}
+            for field in msg.split(b'\0')[1:]:
+                key, sep, value = field.partition(b'=')
+                if sep:
+                    fields[key.decode(errors='replace')] = value.decode(errors='replace')
+
+            if fields.get('SUBSYSTEM') != 'block' or fields.get('DEVTYPE') != 'disk':
+                continue
+
+            action = fields.get('ACTION')
+            device = fields.get('DEVNAME', '').rsplit('/', 1)[-1]
+            if action in ('add', 'remove') and DRIVE_NAME.match(device):
+                self.deliver((action, device))
+
+
+class SharedTemps:
+    # the temperatures fan_control.py runs on, in a fixed-layout shared memory segment updated in
+    # place. the reader copies it and retries when the sequence number was odd or moved while
+    # copying, and is pinged on FAN_CONTROL_SOCKET after every update so it doesn't have to poll
+    # for new samples
+    def __init__(self, path):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, SHM_SIZE)
+            self.mm = mmap.mmap(fd, SHM_SIZE)
+        finally:
+            os.close(fd)
+        magic, version, _, seq = SHM_HEADER.unpack_from(self.mm)[:4]
+        # carry on from the previous monitor's sequence, a reader must never see one repeat
+        self.seq = seq + (seq & 1) if (magic, version) == (SHM_MAGIC, SHM_VERSION) else 0
+        self.temps = {}  # class -> {sensor number: temperature}
+        self.updated = {}  # class -> monotonic time its collector last refreshed it
+        self.interval = 0
+        self.lock = threading.Lock()
+        self.notify = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.notify.setblocking(False)
+
+    def update(self, name=None, temps=None, interval=None):
+        with self.lock:
+            if name is not None:
+                self.temps[name] = temps
+                self.updated[name] = time.monotonic()
+            if interval is not None:
+                self.interval = int(interval)
+
+            sensors = [
+                (SHM_CLASSES.index(name), int(sensor), int(temp))
+                for name, values in self.temps.items() for sensor, temp in values.items()
+            ][:SHM_SLOTS]
+            updated = [self.updated.get(name, 0.0) for name in SHM_CLASSES]
+            buffer = bytearray(SHM_SIZE)
+            SHM_HEADER.pack_into(
+                buffer, 0,
+                SHM_MAGIC, SHM_VERSION, len(sensors), self.seq + 1, self.interval, *updated,
+            )
+            for i, sensor in enumerate(sensors):
+                SHM_SENSOR.pack_into(buffer, SHM_HEADER.size + i * SHM_SENSOR.size, *sensor)
+
+            SHM_SEQ.pack_into(self.mm, SHM_SEQ_OFFSET, self.seq + 1)
+            self.mm[:] = buffer
+            self.seq += 2
+            SHM_SEQ.pack_into(self.mm, SHM_SEQ_OFFSET, self.seq)
+
+        try:
+            self.notify.sendto(b'\1', FAN_CONTROL_SOCKET)
+        except OSError:
+            pass  # fan control not running, or still busy with the previous ping
+
+
 class UNASMonitor:
     def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_publish_done = False
+
+        # all rate counters are primed together up front, so the first cycle usually has a delta
+        # window already (MQTT setup/drive discovery overlap with it). if it's still too short,
+        # rates are left out of that cycle and published from the next sample on, without sleeping
+        self.prev_cpu_stat = {}
+        self.prev_cpu_time = None
+        self.prev_diskstats = {}
+        self.prev_time = None
+        self.drive_io = {}  # device -> per-drive iostat metrics of the last window
+        self.prev_net_dev = {}
+        self.prev_net_time = None
+        self.net_io = {}  # interface -> per-port throughput/link metrics of the last window
+        # interface -> its sysfs speed file, None for non-physical interfaces
+        self.net_speed_files = {}
+        self.proc_net_dev = ProcFile('/proc/net/dev')
+        self.proc_uptime = ProcFile('/proc/uptime', 128)
+        self.proc_meminfo = ProcFile('/proc/meminfo')
+        self.proc_stat = ProcFile('/proc/stat')
+        self.proc_loadavg = ProcFile('/proc/loadavg', 128)
+        # PSI needs kernel 4.20+ with it enabled, a resource whose file can't be read is dropped
+        self.pressure_files = {
+            r: ProcFile(f'/proc/pressure/{r}', 256) for r in ('cpu', 'memory', 'io')
+        }
+        self.proc_diskstats = ProcFile('/proc/diskstats')
+        self.cpu_temp_file = ProcFile('/sys/class/thermal/thermal_zone0/temp', 32)
+        self.pwm_file = ProcFile('/sys/class/hwmon/hwmon0/pwm1', 32)
+        self.prime_counters()
+
+        self.monitor_interval = DEFAULT_MONITOR_INTERVAL
+        self.adaptive = False
+        # collector -> adapted interval (s), capped by monitor_interval
+        self.adaptive_intervals = {}
+        # collector -> deque of (monotonic time, hottest temperature) in the trend window
+        self.temp_trends = {}
+        self.collector_runs = {}  # collector -> monotonic time its latest run was due
+        self.shared_interval = None
+        try:
+            self.shared_temps = SharedTemps(SHARED_TEMPS_SHM)
+        except OSError as e:
+            logger.error(
+                f"Shared temperatures unavailable ({e}), fan control will poll drives itself")
+            self.shared_temps = None
+        self.mqtt_connected = threading.Event()
+
+        self.bay_cache = {}
+        self.bay_identities = {}  # bay -> BAY_IDENTITY_KEYS of the drive last read there
+        self.known_drives = set()
+        self.bay_map_dirty = False
+        self.load_bay_map()
+        self.smart_pools = {
+            kind: concurrent.futures.ThreadPoolExecutor(
+                max_workers=SMART_MAX_WORKERS, thread_name_prefix=f'smartctl-{kind}'
+            )
+            for kind in ('hdd', 'nvme')
+        }
+        self.last_drive_samples = {}  # device -> last good drive dict
+        self.last_nvme_samples = {}  # device -> last good nvme dict
+        self.smart_failures = {}  # device -> smartctl queries failed in a row
+        self.drivetemp = DriveTempReader()
+        self.spin_states = {}  # device -> 'active' | 'standby'
+        self.tier_last_run = {}  # tier -> monotonic timestamp
+        self.static_system = {}
+        self.dpkg_mtime = None
+        self.dpkg_versions = {}
+        self.device_serials = {}  # device -> serial, identity known so smartctl can skip -i
+        self.drive_static = {}  # serial -> static drive facts
+        self.known_nvmes = set()
+        self.nvme_serials = {}
+        self.nvme_static = {}
+        self.published = {}  # topic -> last published value
+        self.wire_format = DEFAULT_WIRE_FORMAT
+        self.requested_wire_format = DEFAULT_WIRE_FORMAT
+        self.state_docs = {}  # group prefix -> latest values, the document published in json mode
+        self.publish_lock = threading.RLock()  # publish caches are shared by the collector threads
+        self.full_publish_requested = False
+        self.full_pending = set()  # collectors whose next run republishes everything
+        self.wire_format_switch = None  # future of a wire format switch in progress
+        self.full_published_at = None
+        # topic prefixes of drives/pools that are gone, cleared on the next publish
+        self.stale_prefixes = []
+        self.pools = []
+        self.proc_tcp = [ProcFile('/proc/net/tcp', 16384), ProcFile('/proc/net/tcp6', 16384)]
+        self.smb_json = None  # whether smbstatus supports --json, probed on first use
+        self.smb_peers = None  # SMB TCP peers the cached sessions were queried for
+        self.smb_refreshed_at = None
+        self.smb_sessions = []
+        self.proc_nfsd = ProcFile(NFSD_STATS_FILE)
+        self.prev_nfsd = None  # (monotonic time, counters) of the last nfsd stats sample
+        self.nfs3_active = False  # v3 calls seen in the last window
+        self.nfs3_clients = []
+
+        self.collectors = ['system', 'hdd', 'nvme', 'pool']
+        # UNVR doesn't have SMB/NFS shares
+        if DEVICE_MODEL != "UNVR":
+            self.collectors += ['smb', 'nfs']
+        self.collector_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.collectors), thread_name_prefix='collector'
+        )
+        # hotplug handling, history and backlog work get their own threads: collector_pool can be
+        # held up by collectors that overran their deadline and keep their thread until they return
+        self.aux_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix='aux'
+        )
+        self.collector_tasks = {}  # name -> asyncio task of the collector's latest run
+        # ticks and collector runs skipped because the previous one was still going
+        self.overruns = 0
+        self.timings = Timings(DIAG_WINDOW)
+        self.history = HistoryStore()
+        self.history.load(HISTORY_FILE, HISTORY_HOURS_FILE)
+        self.history_saved_at = time.monotonic()
+        # (ts, series, value) queued while offline
+        self.backlog = collections.deque(maxlen=BACKLOG_MAX_SAMPLES)
+        self.backlog_flush_requested = False
+        # hdd/nvme collectors and hotplug handling share the drive caches
+        self.drive_lock = threading.Lock()
+
+        self.loop = None
+        self.hotplug_events = None  # asyncio queue the watcher feeds once the event loop runs
+        try:
+            self.hotplug_watcher = HotplugWatcher(self.queue_hotplug_event)
+            self.hotplug_enabled = True
+        except OSError as e:
+            logger.warning(f"uevent netlink unavailable ({e}), scanning /dev every cycle")
+            self.hotplug_watcher = None
+            self.hotplug_enabled = False
+        self.block_devices = self.scan_block_devices()
+        self.previous_drive_map = {}  # serial -> bay
+        self.drive_removed_at = {}  # serial -> (timestamp, bay)
+        self.grace_period = 60
+
         self.mqtt = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
         self.mqtt.username_pw_set(MQTT_USER, MQTT_PASS)
         self.mqtt.on_connect = self._on_connect
@@ -95,306 +883,894 @@ class UNASMonitor:
         self.mqtt.will_set(MQTT_AVAILABILITY, "offline", retain=True)
         self.mqtt.connect(MQTT_HOST, 1883, 60)
         self.mqtt.loop_start()
-        time.sleep(2)
 
-        self.monitor_interval = DEFAULT_MONITOR_INTERVAL
-        self.mqtt.subscribe(MONITOR_INTERVAL_TOPIC)
-        self.mqtt.publish(MQTT_AVAILABILITY, "online", retain=True)
-
-        self.bay_cache = {}
-        self.known_drives = set()
-        self.previous_drive_map = {}  # serial -> bay
-        self.drive_removed_at = {}  # serial -> (timestamp, bay)
-        self.grace_period = 60
-        self.prev_cpu_idle = None
-        self.prev_cpu_total = None
-        self.prev_disk_read = None
-        self.prev_disk_write = None
-        self.prev_time = None
+        # wait for the CONNACK instead of a fixed sleep
+        if not self.mqtt_connected.wait(MQTT_CONNECT_TIMEOUT):
+            logger.warning(f"MQTT not connected after {MQTT_CONNECT_TIMEOUT}s, continuing")
 
     def _on_connect(self, _client, _userdata, _flags, reason_code, _properties):
         if reason_code == 0:
             logger.info("MQTT connected")
+            # (re)subscribe and announce on every connect, the session is not persistent
+            self.mqtt.subscribe(MONITOR_INTERVAL_TOPIC)
+            self.mqtt.subscribe(MQTT_REPUBLISH_TOPIC)
+            self.mqtt.subscribe(MQTT_WIRE_FORMAT_TOPIC)
+            self.mqtt.subscribe(MQTT_ADAPTIVE_TOPIC)
+            self.mqtt.subscribe(MQTT_HISTORY_REQUEST)
+            self.mqtt.publish(MQTT_AVAILABILITY, "online", retain=True)
+            self.full_publish_requested = True
+            self.backlog_flush_requested = True
+            self.mqtt_connected.set()
         else:
             logger.error(f"MQTT failed: {reason_code}")
 
     def _on_disconnect(self, _client, _userdata, _flags, reason_code, _properties):
+        self.mqtt_connected.clear()
         if reason_code != 0:
             logger.warning("MQTT disconnected")
 
     def _on_message(self, _client, _userdata, msg):
-        if msg.topic == MONITOR_INTERVAL_TOPIC:
+        if msg.topic == MQTT_REPUBLISH_TOPIC:
+            self.full_publish_requested = True
+        elif msg.topic == MQTT_HISTORY_REQUEST:
+            # answered off the network thread, a year of hourly rows takes a moment to gather
+            self.aux_pool.submit(self.answer_history, msg.payload)
+        elif msg.topic == MQTT_WIRE_FORMAT_TOPIC:
+            wire_format = msg.payload.decode(errors='replace').strip()
+            # applied by the main loop between cycles, the publish caches are not thread safe
+            if wire_format in WIRE_FORMATS:
+                self.requested_wire_format = wire_format
+        elif msg.topic == MONITOR_INTERVAL_TOPIC:
             try:
                 new_interval = int(float(msg.payload.decode()))
                 if 5 <= new_interval <= 60:
                     old = self.monitor_interval
                     self.monitor_interval = new_interval
                     logger.info(f"Monitor interval: {old}s -> {new_interval}s")
-                    # write interval to shared file for fan control script
-                    try:
-                        with open(MONITOR_INTERVAL_FILE, 'w') as f:
-                            f.write(str(new_interval))
-                    except OSError:
-                        pass
+                    self.write_monitor_interval(only_longer=True)
             except (ValueError, TypeError):
                 pass
+        elif msg.topic == MQTT_ADAPTIVE_TOPIC:
+            adaptive = msg.payload.decode(errors='replace').strip() == 'on'
+            if adaptive != self.adaptive:
+                self.adaptive = adaptive
+                self.adaptive_intervals.clear()
+                self.temp_trends.clear()
+                logger.info(f"Adaptive sampling: {'on' if adaptive else 'off'}")
+                self.write_monitor_interval(only_longer=True)
+
+    @staticmethod
+    def changed(topic, old, new):
+        if old == new:
+            return False
+        deadband = PUBLISH_DEADBANDS.get(topic.rsplit('/', 1)[-1])
+        numeric = isinstance(old, (int, float)) and isinstance(new, (int, float))
+        # always let a drop to zero through so idle drives don't stick at their last small rate
+        if deadband and numeric and new != 0:
+            return abs(new - old) >= deadband
+        return True
+
+    def publish(self, topic, value, force=False):
+        with self.publish_lock:
+            if not force and topic in self.published:
+                if not self.changed(topic, self.published[topic], value):
+                    return
+
+            if isinstance(value, str):
+                payload = value
+            elif isinstance(value, (list, dict)):
+                payload = json.dumps(value)
+            else:
+                payload = str(value)
+            info = self.mqtt.publish(topic, payload, retain=True)
+            # only remember what the broker actually got, so a dropped publish is retried next cycle
+            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                self.published[topic] = value
+
+    def publish_group(self, prefix, data, force=False, record=True):
+        if record:
+            self.record_history(prefix, data)
+
+        with self.publish_lock:
+            if self.wire_format != 'json':
+                for key, value in data.items():
+                    self.publish(f"{prefix}/{key}", value, force)
+                return
+
+            # the retained document always carries the whole group, partial updates are merged in
+            doc = {**self.state_docs.get(prefix, {}), **data}
+            self.state_docs[prefix] = doc
+            topics = {f"{prefix}/{key}": value for key, value in doc.items()}
+            if not force and all(
+                topic in self.published and not self.changed(topic, self.published[topic], value)
+                for topic, value in topics.items()
+            ):
+                return
+
+            info = self.mqtt.publish(f"{prefix}/state", json.dumps(doc), retain=True)
+            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                self.published.update(topics)
+
+    def clear_topics(self, prefix):
+        # wipe retained topics of a drive/pool that is gone for good
+        with self.publish_lock:
+            if self.state_docs.pop(prefix.rstrip('/'), None) is not None:
+                self.mqtt.publish(f"{prefix}state", "", retain=True)
+            for topic in [t for t in self.published if t.startswith(prefix)]:
+                if self.wire_format != 'json':
+                    self.mqtt.publish(topic, "", retain=True)
+                del self.published[topic]
+
+    def record_history(self, prefix, data):
+        now = int(time.time())
+        group = prefix[len(MQTT_ROOT) + 1:]
+        offline = not self.mqtt_connected.is_set()
+        for key, value in data.items():
+            numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if key in HISTORY_METRICS and numeric:
+                self.history.record(f"{group}/{key}", value, now)
+                if offline:
+                    self.backlog.append((now, f"{group}/{key}", value))
+
+    def flush_backlog(self):
+        if self.backlog:
+            logger.info(f"Flushing {len(self.backlog)} samples queued while MQTT was down")
+        while self.backlog and self.mqtt_connected.is_set():
+            count = min(BACKLOG_BATCH_SAMPLES, len(self.backlog))
+            batch = [self.backlog.popleft() for _ in range(count)]
+            series = {}
+            for ts, name, value in batch:
+                series.setdefault(name, []).append([ts, value])
+
+            # retained so it waits for HA if HA isn't subscribed yet, HA clears it once imported
+            info = self.mqtt.publish(
+                f"{MQTT_BACKLOG}/{batch[0][0]}-{len(batch)}",
+                json.dumps({'series': series}, separators=(',', ':')),
+                qos=1,
+                retain=True,
+            )
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                # dropped again, keep the samples for the next reconnect
+                self.backlog.extendleft(reversed(batch))
+                break
+
+    def answer_history(self, payload):
+        # request: {"id": "x", "series": "hdd/*/temperature", "tier": "raw|minute|hour",
+        #           "start": ts, "end": ts}
+        # response on MQTT_HISTORY_RESPONSE/<id>, one compact JSON document with a column set per
+        # series
+        request_id = 'default'
+        try:
+            request = json.loads(payload)
+            request_id = re.sub(r'[^A-Za-z0-9_.-]', '', str(request.get('id', request_id)))
+            request_id = request_id or 'default'
+            tier = request.get('tier', 'raw')
+            if tier not in ('raw', 'minute', 'hour'):
+                raise ValueError(f"unknown tier {tier}")
+            end = int(request.get('end', time.time()))
+            start = int(request.get('start', end - 3600))
+            response = {
+                'id': request_id,
+                'tier': tier,
+                'start': start,
+                'end': end,
+                'series': self.history.query(str(request.get('series', '*')), tier, start, end),
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            response = {'id': request_id, 'error': str(e)}
+        self.mqtt.publish(
+            f"{MQTT_HISTORY_RESPONSE}/{request_id}", json.dumps(response, separators=(',', ':'))
+        )
 
-    def publish_system(self, metric, value):
-        self.mqtt.publish(f"{MQTT_SYSTEM}/{metric}", str(value), retain=True)
-    
-    def publish_hdd(self, bay, metric, value):
-        self.mqtt.publish(f"{MQTT_HDD}/{bay}/{metric}", str(value), retain=True)
-    
-    def publish_nvme(self, slot, metric, value):
-        self.mqtt.publish(f"{MQTT_NVME}/{slot}/{metric}", str(value), retain=True)
-    
-    def publish_pool(self, pool_num, metric, value):
-        self.mqtt.publish(f"{MQTT_POOL}/{pool_num}/{metric}", str(value), retain=True)
+    def clear_stale_topics(self):
+        with self.publish_lock:
+            while self.stale_prefixes:
+                self.clear_topics(self.stale_prefixes.pop())
+
+    def switch_wire_format(self):
+        with self.publish_lock:
+            self.reencode_published()
+
+    def reencode_published(self):
+        old, new = self.wire_format, self.requested_wire_format
+        groups = {}
+        for topic, value in self.published.items():
+            prefix, key = topic.rsplit('/', 1)
+            groups.setdefault(prefix, {})[key] = value
+
+        # re-encode what HA already has in one burst: retract the old retained topics, then send
+        # the new ones
+        for prefix, data in groups.items():
+            if old == 'json':
+                self.mqtt.publish(f"{prefix}/state", "", retain=True)
+            else:
+                for key in data:
+                    self.mqtt.publish(f"{prefix}/{key}", "", retain=True)
+
+        self.wire_format = new
+        self.published = {}
+        self.state_docs = {}
+        for prefix, data in groups.items():
+            self.publish_group(prefix, data, force=True, record=False)
+        logger.info(f"Wire format: {old} -> {new}")
+
+    def tier_due(self, tier, collector):
+        # tracked per collector, a skipped or slow collector catches up on its own next run
+        now = time.monotonic()
+        last = self.tier_last_run.get((collector, tier))
+        if last is not None and now - last < TIER_INTERVALS[tier]:
+            return False
+        self.tier_last_run[(collector, tier)] = now
+        return True
+
+    def collector_interval(self, name):
+        if not self.adaptive:
+            return self.monitor_interval
+        return min(self.adaptive_intervals.get(name, self.monitor_interval), self.monitor_interval)
+
+    def adapt_interval(self, name, temps, busy):
+        # end of a system/hdd/nvme run: sample fast while heating up or under load, back off
+        # when flat
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        trend = self.temp_trends.setdefault(name, collections.deque())
+        if temps:
+            trend.append((now, max(temps)))
+        while trend and now - trend[0][0] > ADAPTIVE_TREND_WINDOW:
+            trend.popleft()
+
+        rising = bool(trend) and trend[-1][1] - min(t for _, t in trend) >= ADAPTIVE_TEMP_RISE
+        loaded = max(busy, default=0) >= ADAPTIVE_BUSY
+        current = self.collector_interval(name)
+        if rising or loaded:
+            interval = ADAPTIVE_MIN_INTERVAL
+        else:
+            interval = min(current * 2, self.monitor_interval)
+        if interval != current:
+            reason = 'temperature rising' if rising else 'disks busy' if loaded else 'flat'
+            logger.info(f"{name} collector interval: {current}s -> {interval}s ({reason})")
+        self.adaptive_intervals[name] = interval
+
+    def write_monitor_interval(self, only_longer=False):
+        # fan_control.py derives the staleness threshold of the shared temperatures from this, so it
+        # carries the hdd collector's pace. a shorter one only goes in after a run has just
+        # refreshed the temperatures
+        interval = self.collector_interval('hdd')
+        if interval == self.shared_interval or self.shared_temps is None:
+            return
+        if only_longer and self.shared_interval is not None and interval < self.shared_interval:
+            return
+        self.shared_temps.update(interval=interval)
+        self.shared_interval = interval
 
     def run_cmd(self, cmd, timeout=10):
+        program = os.path.basename(cmd.split()[0] if isinstance(cmd, str) else cmd[0])
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, shell=isinstance(cmd, str))
+            with self.timings.timed(f"cmd_{program}"):
+                result = subprocess.run(
+                    cmd, capture_output=True, text=True, timeout=timeout, shell=isinstance(cmd, str)
+                )
             return result.stdout
         except (subprocess.SubprocessError, OSError):
             return ""
 
-    def write_max_hdd_temp(self, temp):
+    def share_temperatures(self, name, temps):
+        # every temperature sensor by class (hdd by bay, nvme by slot, cpu) for fan_control.py's
+        # policies. the classes come from collectors on different intervals, so each carries its
+        # own refresh time
+        if self.shared_temps is not None:
+            self.shared_temps.update(name, temps)
+
+    def get_package_versions(self, packages):
+        # parse the dpkg database directly instead of forking dpkg-query, and only when it changed
         try:
-            with open(SHARED_TEMP_FILE, 'w') as f:
-                f.write(str(temp))
+            mtime = os.stat(DPKG_STATUS_FILE).st_mtime_ns
         except OSError:
-            pass
+            return {}
 
-    def get_system_metrics(self):
+        if mtime != self.dpkg_mtime:
+            versions = {}
+            package = None
+            try:
+                with open(DPKG_STATUS_FILE, encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        if line.startswith('Package: '):
+                            package = line[9:].strip()
+                        elif line.startswith('Version: ') and package in packages:
+                            versions[package] = line[9:].strip()
+                        elif not line.strip():
+                            package = None
+            except OSError:
+                return self.dpkg_versions
+
+            self.dpkg_mtime = mtime
+            self.dpkg_versions = versions
+
+        return self.dpkg_versions
+
+    def get_static_system(self):
+        versions = self.get_package_versions({'unifi-core', 'unifi-protect', 'unifi-drive'})
+        data = {'os_version': versions.get('unifi-core', '')}
+        if DEVICE_MODEL == "UNVR":
+            data['protect_version'] = versions.get('unifi-protect', '')
+        else:
+            data['drive_version'] = versions.get('unifi-drive', '')
+        return data
+
+    def get_rate_metrics(self):
         data = {}
+        cpu = self.get_cpu_metrics()
+        if cpu is not None:
+            data.update(cpu)
+        disk_read, disk_write = self.get_disk_throughput()
+        if disk_read is not None:
+            data['disk_read'], data['disk_write'] = disk_read, disk_write
+        network_rx, network_tx = self.get_network_throughput()
+        if network_rx is not None:
+            data['network_rx'], data['network_tx'] = network_rx, network_tx
+        return data
 
-        with open('/proc/uptime') as f:
-            data['uptime'] = int(float(f.read().split()[0]))
+    def get_system_metrics(self, refresh_static=False):
+        data = {}
 
-        data['os_version'] = self.run_cmd(['dpkg-query', '-W', '-f=${Version}', 'unifi-core']).strip()
-        if DEVICE_MODEL == "UNVR":
-            data['protect_version'] = self.run_cmd(['dpkg-query', '-W', '-f=${Version}', 'unifi-protect']).strip()
-        else:
-            data['drive_version'] = self.run_cmd(['dpkg-query', '-W', '-f=${Version}', 'unifi-drive']).strip()
-        data['cpu_usage'] = self.get_cpu_usage()
-        data['disk_read'], data['disk_write'] = self.get_disk_throughput()
+        data['uptime'] = int(self.proc_uptime.read().search(UPTIME_SECONDS).group())
+
+        if refresh_static or not self.static_system:
+            self.static_system = self.get_static_system()
+        data.update(self.static_system)
 
-        with open('/proc/meminfo') as f:
-            meminfo = {parts[0].rstrip(':'): int(parts[1]) for line in f if len(parts := line.split()) >= 2}
+        data.update(self.get_rate_metrics())
 
-        mem_total = meminfo.get('MemTotal', 0) // 1024
-        mem_avail = meminfo.get('MemAvailable', 0) // 1024
+        self.proc_meminfo.read()
+        total = self.proc_meminfo.search(MEMINFO_TOTAL)
+        avail = self.proc_meminfo.search(MEMINFO_AVAILABLE)
+        mem_total = int(total.group(1)) // 1024 if total else 0
+        mem_avail = int(avail.group(1)) // 1024 if avail else 0
         mem_used = mem_total - mem_avail
 
         data['memory_total'] = mem_total
         data['memory_used'] = mem_used
         data['memory_usage'] = round((mem_used / mem_total) * 100, 1) if mem_total else 0
 
+        load = self.proc_loadavg.read().search(LOADAVG)
+        data['load_1m'], data['load_5m'], data['load_15m'] = (float(v) for v in load.groups())
+        data.update(self.get_pressure())
+
         try:
-            with open('/sys/class/thermal/thermal_zone0/temp') as f:
-                data['cpu_temp'] = int(f.read().strip()) // 1000
+            data['cpu_temp'] = self.cpu_temp_file.value() // 1000
         except (OSError, ValueError):
             data['cpu_temp'] = 0
 
         try:
-            with open('/sys/class/hwmon/hwmon0/pwm1') as f:
-                pwm = int(f.read().strip())
-                data['fan_speed'] = pwm
-                data['fan_speed_percent'] = int((pwm * 100) / 255)
+            pwm = self.pwm_file.value()
+            data['fan_speed'] = pwm
+            data['fan_speed_percent'] = int((pwm * 100) / 255)
         except (OSError, ValueError):
             data['fan_speed'] = 0
             data['fan_speed_percent'] = 0
 
         return data
 
-    def get_cpu_usage(self):
-        def read_proc_stat():
-            with open('/proc/stat') as f:
-                parts = f.readline().split()
-                values = list(map(int, parts[1:]))
-            idle_time = values[3] + values[4]  # idle + iowait
-            total_time = sum(values)
-            return idle_time, total_time
+    def get_pressure(self):
+        # PSI avg10: share of the last 10s some (or, for "full", all) runnable tasks were
+        # stalled on the resource
+        data = {}
+        for resource, pressure_file in list(self.pressure_files.items()):
+            try:
+                pressure_file.read()
+            except OSError:
+                del self.pressure_files[resource]
+                logger.info(f"No pressure stall information for {resource}")
+                continue
+            for m in pressure_file.finditer(PSI_AVG10):
+                kind = m.group(1).decode()
+                # system-wide cpu "full" is always zero, the row only exists for cgroups
+                if resource != 'cpu' or kind == 'some':
+                    data[f"{resource}_pressure_{kind}"] = float(m.group(2))
+        return data
 
-        # handle script startup/restart to avoid reporting 0% usage to HA
-        if self.prev_cpu_idle is None:
-            idle_start, total_start = read_proc_stat()
-            time.sleep(1.0)
-            idle_end, total_end = read_proc_stat()
+    def read_proc_stat(self):
+        # core ('' for the aggregate row) -> counters, all cores from one read
+        stats = {}
+        for m in self.proc_stat.read().finditer(PROC_STAT_CPUS):
+            stats[m.group(1).decode()] = tuple(map(int, m.groups()[1:]))
+        return stats
+
+    def read_diskstats(self):
+        # per drive: reads, sectors read, ms reading, writes, sectors written, ms writing,
+        # io_ticks (ms busy), time_in_queue (weighted ms)
+        stats = {}
+        for m in self.proc_diskstats.read().finditer(DISKSTATS_DRIVE):
+            stats[m.group(1).decode()] = tuple(map(int, m.groups()[1:]))
+        return stats
+
+    def is_physical_interface(self, iface):
+        # ports have a backing device, lo/bridges/vlans/tunnels don't
+        if iface not in self.net_speed_files:
+            path = f"{SYS_CLASS_NET}/{iface}"
+            if os.path.exists(f"{path}/device"):
+                self.net_speed_files[iface] = ProcFile(f"{path}/speed", 32)
+            else:
+                self.net_speed_files[iface] = None
+        return self.net_speed_files[iface] is not None
+
+    def read_net_dev(self):
+        # per physical interface: rx bytes, rx packets, rx errs, rx drop,
+        # tx bytes, tx packets, tx errs, tx drop
+        stats = {}
+        for m in self.proc_net_dev.read().finditer(NET_DEV_IFACE):
+            iface = m.group(1).decode()
+            if self.is_physical_interface(iface):
+                stats[iface] = tuple(map(int, m.groups()[1:]))
+        return stats
+
+    def prime_counters(self):
+        self.prev_cpu_stat = self.read_proc_stat()
+        self.prev_diskstats = self.read_diskstats()
+        self.prev_net_dev = self.read_net_dev()
+        self.prev_cpu_time = self.prev_time = self.prev_net_time = time.monotonic()
+
+    def get_cpu_metrics(self):
+        # None until the counter window is long enough to give a meaningful figure
+        now = time.monotonic()
+        if now - self.prev_cpu_time < RATE_MIN_WINDOW:
+            return None
+
+        stat = self.read_proc_stat()
+        prev_stat = self.prev_cpu_stat
+        self.prev_cpu_stat = stat
+        self.prev_cpu_time = now
 
-            self.prev_cpu_idle = idle_end
-            self.prev_cpu_total = total_end
+        data = {}
+        cores = []
+        for core, counters in stat.items():
+            prev = prev_stat.get(core)
+            if prev is None:
+                continue
+            delta = [n - p for n, p in zip(counters, prev)]
+            total = sum(delta)
+            # idle + iowait
+            usage = int(100 * (1 - (delta[3] + delta[4]) / total)) if total > 0 else 0
+            if core:
+                cores.append(usage)
+            else:
+                data['cpu_usage'] = usage
+                data['cpu_iowait'] = round(100 * delta[4] / total, 1) if total > 0 else 0
+                data['cpu_softirq'] = round(100 * delta[6] / total, 1) if total > 0 else 0
 
-            delta_idle = idle_end - idle_start
-            delta_total = total_end - total_start
+        # the average hides one core pegged by a single-threaded smbd
+        data['cpu_cores'] = cores
+        data['cpu_core_max'] = max(cores, default=data.get('cpu_usage', 0))
+        return data
 
-            if delta_total <= 0:
-                return 0
+    def get_disk_throughput(self):
+        # one diskstats pass gives the sdX totals and the per-drive iostat figures in drive_io
+        time_now = time.monotonic()
+        time_delta = time_now - self.prev_time
+        if time_delta < RATE_MIN_WINDOW:
+            return None, None
 
-            return int(100 * (1 - delta_idle / delta_total))
+        stats = self.read_diskstats()
+        read_bytes = 0
+        write_bytes = 0
+        drive_io = {}
 
-        idle_now, total_now = read_proc_stat()
-        delta_idle = idle_now - self.prev_cpu_idle
-        delta_total = total_now - self.prev_cpu_total
+        for device, now in stats.items():
+            prev = self.prev_diskstats.get(device)
+            if prev is None:
+                continue
+            reads, read_sectors, read_ms, writes, write_sectors, write_ms, io_ticks, queue_ms = (
+                n - p for n, p in zip(now, prev)
+            )
+            if device.startswith('sd'):
+                read_bytes += read_sectors * 512
+                write_bytes += write_sectors * 512
+
+            drive_io[device] = {
+                'read_speed': round(read_sectors * 512 / time_delta / (1024 * 1024), 2),
+                'write_speed': round(write_sectors * 512 / time_delta / (1024 * 1024), 2),
+                'read_iops': round(reads / time_delta, 1),
+                'write_iops': round(writes / time_delta, 1),
+                'busy': round(min(100.0, io_ticks / (time_delta * 10)), 1),
+                'queue_depth': round(queue_ms / (time_delta * 1000), 2),
+                'read_latency': round(read_ms / reads, 1) if reads else 0,
+                'write_latency': round(write_ms / writes, 1) if writes else 0,
+            }
 
-        self.prev_cpu_idle = idle_now
-        self.prev_cpu_total = total_now
+        # swapped in whole, the drive collectors read it from their own threads
+        self.drive_io = drive_io
+        self.prev_diskstats = stats
+        self.prev_time = time_now
 
-        if delta_total <= 0:
-            return 0
+        read_mbps = (read_bytes / time_delta) / (1024 * 1024)
+        write_mbps = (write_bytes / time_delta) / (1024 * 1024)
 
-        return int(100 * (1 - delta_idle / delta_total))
+        return round(read_mbps, 2), round(write_mbps, 2)
 
-    def get_disk_throughput(self):
-        def read_diskstats():
-            read_sectors = 0
-            write_sectors = 0
-            with open('/proc/diskstats') as f:
-                for line in f:
-                    parts = line.split()
-                    if len(parts) < 10:
-                        continue
-                    device = parts[2]
-                    if device.startswith('sd') and len(device) == 3:
-                        read_sectors += int(parts[5])
-                        write_sectors += int(parts[9])
-            return read_sectors, write_sectors
-
-        # handle script startup/restart to avoid reporting 0mbps usage to HA
-        if self.prev_disk_read is None:
-            read_start, write_start = read_diskstats()
-            time_start = time.time()
-            time.sleep(1.0)
-            read_end, write_end = read_diskstats()
-            time_end = time.time()
-
-            self.prev_disk_read = read_end
-            self.prev_disk_write = write_end
-            self.prev_time = time_end
-
-            time_delta = time_end - time_start
-            read_bytes = (read_end - read_start) * 512
-            write_bytes = (write_end - write_start) * 512
-
-            read_mbps = (read_bytes / time_delta) / (1024 * 1024)
-            write_mbps = (write_bytes / time_delta) / (1024 * 1024)
-
-            return round(read_mbps, 2), round(write_mbps, 2)
-
-        read_now, write_now = read_diskstats()
-        time_now = time.time()
+    def get_network_throughput(self):
+        # totals over the physical ports, the per-port figures go to net_io
+        time_now = time.monotonic()
+        time_delta = time_now - self.prev_net_time
+        if time_delta < RATE_MIN_WINDOW:
+            return None, None
+
+        stats = self.read_net_dev()
+        rx_total = 0
+        tx_total = 0
+        net_io = {}
+
+        for iface, now in stats.items():
+            prev = self.prev_net_dev.get(iface)
+            if prev is None:
+                continue
+            # counters restart from zero when the driver is reloaded
+            deltas = (max(0, n - p) for n, p in zip(now, prev))
+            rx_bytes, rx_packets, _, _, tx_bytes, tx_packets, _, _ = deltas
+            rx_total += rx_bytes
+            tx_total += tx_bytes
 
-        time_delta = time_now - self.prev_time
-        read_bytes = (read_now - self.prev_disk_read) * 512
-        write_bytes = (write_now - self.prev_disk_write) * 512
+            try:
+                # negotiated Mb/s, -1 or EINVAL while the link is down
+                link_speed = max(0, self.net_speed_files[iface].value())
+            except (OSError, ValueError):
+                link_speed = 0
+            # full duplex, the busier direction is what saturates first
+            busiest_mbit = max(rx_bytes, tx_bytes) * 8 / time_delta / 1_000_000
+
+            net_io[iface] = {
+                'rx_speed': round(rx_bytes / time_delta / (1024 * 1024), 2),
+                'tx_speed': round(tx_bytes / time_delta / (1024 * 1024), 2),
+                'rx_packets': round(rx_packets / time_delta, 1),
+                'tx_packets': round(tx_packets / time_delta, 1),
+                'errors': now[2] + now[6],
+                'drops': now[3] + now[7],
+                'link_speed': link_speed,
+                'utilization': (
+                    round(min(100.0, busiest_mbit * 100 / link_speed), 1) if link_speed else 0
+                ),
+            }
 
-        self.prev_disk_read = read_now
-        self.prev_disk_write = write_now
-        self.prev_time = time_now
+        self.net_io = net_io
+        self.prev_net_dev = stats
+        self.prev_net_time = time_now
 
-        if time_delta <= 0:
-            return 0.0, 0.0
+        rx_speed = round(rx_total / time_delta / (1024 * 1024), 2)
+        tx_speed = round(tx_total / time_delta / (1024 * 1024), 2)
+        return rx_speed, tx_speed
 
-        read_mbps = (read_bytes / time_delta) / (1024 * 1024)
-        write_mbps = (write_bytes / time_delta) / (1024 * 1024)
+    def load_bay_map(self):
+        # the bay map survives monitor restarts; /tmp is cleared on reboot when sdX names may
+        # change. drives may have been swapped while the monitor was down, so every entry is
+        # resolved again from sysfs and the saved bay only stands in when that fails
+        try:
+            with open(BAY_MAP_FILE) as f:
+                saved = json.load(f)
+            bays = dict(saved['bays'])
+            self.known_drives = set(saved['drives'])
+            self.bay_identities = dict(saved.get('identities', {}))
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+        for device, saved_bay in bays.items():
+            bay = self.resolve_bay(device) or saved_bay
+            if bay != saved_bay:
+                logger.info(f"/dev/{device} is in bay {bay} now, not bay {saved_bay}")
+                self.bay_map_dirty = True
+            self.bay_cache[device] = bay
+
+    def save_bay_map(self):
+        try:
+            with open(BAY_MAP_FILE, 'w') as f:
+                json.dump({
+                    'drives': sorted(self.known_drives),
+                    'bays': self.bay_cache,
+                    'identities': self.bay_identities,
+                }, f)
+        except OSError:
+            pass
 
-        return round(read_mbps, 2), round(write_mbps, 2)
+    def resolve_bay(self, device):
+        # /sys/block/sdX links to .../ataN/hostM/target.../block/sdX
+        for part in os.path.realpath(f'/sys/block/{device}').split('/'):
+            if part.startswith('ata') and (ata_num := part[3:]) in ATA_TO_BAY:
+                return ATA_TO_BAY[ata_num]
+        return None
 
     def get_bay_number(self, device):
         if device in self.bay_cache:
             return self.bay_cache[device]
 
-        output = self.run_cmd(['udevadm', 'info', '-q', 'path', '-n', f'/dev/{device}'])
-        bay = None
-        for part in output.split('/'):
-            if part.startswith('ata') and (ata_num := part[3:]) in ATA_TO_BAY:
-                bay = ATA_TO_BAY[ata_num]
-                break
-
+        bay = self.resolve_bay(device)
         self.bay_cache[device] = bay
+        self.bay_map_dirty = True
         return bay
 
-    def get_drives(self):
-        current_drives = {p.name for p in Path('/dev').glob('sd?')}
-
-        if current_drives != self.known_drives:
-            self.bay_cache.clear()
-            self.known_drives = current_drives
-
-        drives = []
-        current_drive_map = {}
-        max_temp = 0
-        now = time.time()
-
-        for device_path in Path('/dev').glob('sd?'):
-            device = device_path.name
-            bay = self.get_bay_number(device)
-
-            if not bay:
-                continue
-
-            output = self.run_cmd(['smartctl', '-a', '-j', f'/dev/{device}'])
-            if not output:
-                continue
-
+    def query_smart(self, devices, brief=(), standby_check=False):
+        # query all drives at once so a cycle costs as much as the slowest drive, not the sum.
+        # devices in brief already have cached identity, so only health and attributes are read.
+        # devices that fail, return bad JSON or miss the deadline are left out of the result
+        futures = {}
+        for device in devices:
+            options = ['-H', '-A'] if device in brief else ['-a']
+            if standby_check:
+                # smartctl issues CHECK POWER MODE first and bails out without waking the disk
+                options = ['-n', 'standby', *options]
+            pool = self.smart_pools['nvme' if device.startswith('nvme') else 'hdd']
+            futures[device] = pool.submit(
+                self.run_cmd, ['smartctl', *options, '-j', f'/dev/{device}'], SMART_TIMEOUT
+            )
+
+        results = {}
+        deadline = time.monotonic() + SMART_TIMEOUT + 1
+        for device, future in futures.items():
             try:
-                data = json.loads(output)
+                output = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                results[device] = json.loads(output) if output else None
+            except concurrent.futures.TimeoutError:
+                logger.warning(f"smartctl timed out for /dev/{device}, keeping last sample")
             except json.JSONDecodeError:
-                continue
-
-            if 'error' in data or not data.get('smart_status'):
-                continue
+                pass
 
-            serial = data.get('serial_number', 'Unknown')
+            if results.get(device) is None:
+                results.pop(device, None)
+                self.smart_failures[device] = self.smart_failures.get(device, 0) + 1
+                if self.smart_failures[device] == SMART_MAX_FAILURES:
+                    logger.warning(
+                        f"smartctl failed {SMART_MAX_FAILURES} times in a row for /dev/{device}"
+                    )
+            else:
+                self.smart_failures.pop(device, None)
 
-            temp = data.get('temperature', {}).get('current', 0)
-            max_temp = max(max_temp, temp)
+        return results
 
-            drive = {
-                'bay': bay,
-                'model': data.get('model_name') or data.get('product', 'Unknown'),
-                'serial': serial,
-                'firmware': data.get('firmware_version', 'Unknown'),
-                'status': "Optimal" if data.get('smart_status', {}).get('passed') else "Warning",
-                'temperature': temp
-            }
+    def smart_failed(self, device):
+        # too many failed queries in a row to keep passing the cached sample off as current
+        return self.smart_failures.get(device, 0) >= SMART_MAX_FAILURES
 
-            rotation = data.get('rotation_rate', 0)
-            if rotation > 0:
-                drive['rpm'] = rotation
-
-            for attr in data.get('ata_smart_attributes', {}).get('table', []):
-                name = attr.get('name', '').lower()
-                if name == 'power_on_hours':
-                    # smartctl JSON: raw.value can be vendor-packed; prefer decoded hours
-                    poh = (data.get('power_on_time') or {}).get('hours')
-                    if isinstance(poh, (int, float)) and poh >= 0:
-                        drive['power_on_hours'] = int(poh)
-                    else:
-                        raw = attr.get('raw') or {}
-                        # raw.string looks like: "40311 (52 181 0)"
-                        s = raw.get('string', '')
-                        if isinstance(s, str) and s:
-                            try:
-                                drive['power_on_hours'] = int(s.split()[0])
-                            except (ValueError, IndexError):
-                                drive['power_on_hours'] = int(raw.get('value', 0) or 0)
-                        else:
+    def check_power_mode(self, device):
+        # ATA CHECK POWER MODE over the HDIO_DRIVE_CMD ioctl (what hdparm -C does), answered without
+        # spinning the disk up. None when the ioctl isn't available, the caller then falls back to
+        # smartctl -n standby
+        try:
+            fd = os.open(f'/dev/{device}', os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+        try:
+            args = bytearray([ATA_CHECK_POWER_MODE, 0, 0, 0])
+            fcntl.ioctl(fd, HDIO_DRIVE_CMD, args)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        # sector count register: 0x00 standby, 0x40 spun down with NV cache, 0x41/0x80/0xff spinning
+        return 'standby' if args[2] in (0x00, 0x40) else 'active'
+
+    @staticmethod
+    def in_standby(data):
+        # smartctl -n standby skipped the device: "Device is in STANDBY mode, exit(2)"
+        for message in data.get('smartctl', {}).get('messages', []):
+            text = message.get('string', '')
+            if 'STANDBY' in text or 'SLEEP' in text:
+                return True
+        return False
+
+    def set_spin_state(self, device, state):
+        previous = self.spin_states.get(device)
+        if previous != state:
+            if previous is not None:
+                logger.info(f"/dev/{device} spin state: {previous} -> {state}")
+            self.spin_states[device] = state
+
+    def parse_hdd(self, bay, data):
+        drive = {
+            'bay': bay,
+            'model': data.get('model_name') or data.get('product', 'Unknown'),
+            'serial': data.get('serial_number', 'Unknown'),
+            'firmware': data.get('firmware_version', 'Unknown'),
+            'status': "Optimal" if data.get('smart_status', {}).get('passed') else "Warning",
+            'temperature': data.get('temperature', {}).get('current', 0)
+        }
+
+        rotation = data.get('rotation_rate', 0)
+        if rotation > 0:
+            drive['rpm'] = rotation
+
+        for attr in data.get('ata_smart_attributes', {}).get('table', []):
+            name = attr.get('name', '').lower()
+            if name == 'power_on_hours':
+                # smartctl JSON: raw.value can be vendor-packed; prefer decoded hours
+                poh = (data.get('power_on_time') or {}).get('hours')
+                if isinstance(poh, (int, float)) and poh >= 0:
+                    drive['power_on_hours'] = int(poh)
+                else:
+                    raw = attr.get('raw') or {}
+                    # raw.string looks like: "40311 (52 181 0)"
+                    s = raw.get('string', '')
+                    if isinstance(s, str) and s:
+                        try:
+                            drive['power_on_hours'] = int(s.split()[0])
+                        except (ValueError, IndexError):
                             drive['power_on_hours'] = int(raw.get('value', 0) or 0)
-                elif name == 'reallocated_sector_ct':
-                    drive['bad_sectors'] = attr.get('raw', {}).get('value', 0)
+                    else:
+                        drive['power_on_hours'] = int(raw.get('value', 0) or 0)
+            elif name == 'reallocated_sector_ct':
+                drive['bad_sectors'] = attr.get('raw', {}).get('value', 0)
+
+        if 'bad_sectors' not in drive:
+            drive['bad_sectors'] = 0
+
+        if 'power_on_hours' not in drive:
+            drive['power_on_hours'] = data.get('power_on_time', {}).get('hours', 0)
+
+        size_bytes = data.get('user_capacity', {}).get('bytes', 0)
+        drive['total_size'] = round(size_bytes / (1024 ** 4), 2)
+
+        return drive
+
+    def parse_nvme(self, slot, data):
+        health = data.get('nvme_smart_health_information_log', {})
+
+        nvme = {
+            'slot': slot,
+            'model': data.get('model_name', 'Unknown'),
+            'serial': data.get('serial_number', 'Unknown'),
+            'firmware': data.get('firmware_version', 'Unknown'),
+            'status': "Optimal",
+            'temperature': health.get('temperature', 0),
+            'power_on_hours': health.get('power_on_hours', 0),
+            'percentage_used': health.get('percentage_used', 0),
+            'available_spare': health.get('available_spare', 100),
+            'media_errors': health.get('media_errors', 0),
+            'unsafe_shutdowns': health.get('unsafe_shutdowns', 0)
+        }
+
+        size_bytes = data.get('user_capacity', {}).get('bytes', 0)
+        nvme['total_size'] = round(size_bytes / (1024 ** 4), 2)
+
+        if health.get('critical_warning', 0) != 0 or health.get('available_spare', 100) < 10:
+            nvme['status'] = "Warning"
+
+        return nvme
+
+    def remember_identity(self, serials, static_cache, device, data):
+        # cache identity from a full smartctl read, or merge the cached identity into a brief one
+        if 'serial_number' in data:
+            serial = data['serial_number']
+            serials[device] = serial
+            static_cache[serial] = {
+                key: data[key] for key in (
+                    'model_name', 'product', 'serial_number', 'firmware_version', 'rotation_rate',
+                    'user_capacity',
+                ) if key in data
+            }
+            return data
+
+        return {**static_cache.get(serials.get(device), {}), **data}
+
+    def scan_block_devices(self):
+        return {p.name for p in Path('/dev').iterdir() if DRIVE_NAME.match(p.name)}
+
+    def current_devices(self, pattern):
+        # the hotplug watcher keeps block_devices current, without it fall back to globbing /dev
+        if not self.hotplug_enabled:
+            return {p.name for p in Path('/dev').glob(pattern)}
+        return {device for device in self.block_devices if fnmatch(device, pattern)}
+
+    def build_drive(self, device, bay, data, power_state=None):
+        # power_state: the power mode checked this cycle for a drive smartctl wasn't run on
+        if data is not None:
+            power_state = 'standby' if self.in_standby(data) else 'active'
+            if power_state == 'standby':
+                data = None
+        if power_state is not None:
+            self.set_spin_state(device, power_state)
+
+        if data is None and self.smart_failed(device):
+            self.last_drive_samples.pop(device, None)
+            return None
+        if data is None:
+            # not queried, asleep, timed out or failed this cycle - reuse the last good sample for
+            # this bay
+            drive = self.last_drive_samples.get(device)
+            if not drive or drive['bay'] != bay:
+                if self.spin_states.get(device) != 'standby':
+                    return None
+                # asleep since the monitor started: publish the bay as idle under the identity
+                # it had last time, rather than dropping it until the disk spins up
+                return {'bay': bay, **self.bay_identities.get(bay, {}), 'spin_state': 'standby'}
+            drive = dict(drive)
+        elif 'error' in data or not data.get('smart_status'):
+            return None
+        else:
+            drive = self.parse_hdd(
+                bay, self.remember_identity(self.device_serials, self.drive_static, device, data)
+            )
+            identity = {key: drive[key] for key in BAY_IDENTITY_KEYS if key in drive}
+            if self.bay_identities.get(bay) != identity:
+                self.bay_identities[bay] = identity
+                self.bay_map_dirty = True
+
+        drive['spin_state'] = self.spin_states.get(device, 'active')
+
+        # drivetemp issues SCT/SMART reads of its own: only read disks confirmed spinning this
+        # cycle, one that went to sleep since the last check keeps its last temperature
+        if power_state == 'active':
+            temp = self.drivetemp.read(device)
+            if temp is not None:
+                drive['temperature'] = temp
+        self.last_drive_samples[device] = dict(drive)
+        return drive
+
+    def get_drives(self, refresh_static=False, refresh_smart=True):
+        current_drives = self.current_devices('sd?')
 
-            if 'bad_sectors' not in drive:
-                drive['bad_sectors'] = 0
+        if current_drives != self.known_drives:
+            # drive set changed behind our back: re-read identity for everything,
+            # a device name may now be a different drive
+            self.bay_cache.clear()
+            self.device_serials.clear()
+            self.known_drives = current_drives
 
-            if 'power_on_hours' not in drive:
-                drive['power_on_hours'] = data.get('power_on_time', {}).get('hours', 0)
+        if current_drives != self.drivetemp.devices:
+            self.drivetemp.refresh(current_drives)
+
+        if refresh_static:
+            self.device_serials.clear()
+
+        # forget samples of devices that went away so a reused sdX name can't inherit them
+        for device in list(self.last_drive_samples):
+            if device not in current_drives:
+                del self.last_drive_samples[device]
+        for device in list(self.spin_states):
+            if device not in current_drives:
+                del self.spin_states[device]
+        for device in list(self.smart_failures):
+            if device not in current_drives and not device.startswith('nvme'):
+                del self.smart_failures[device]
+
+        device_bays = {}
+        for device in current_drives:
+            bay = self.get_bay_number(device)
+            if bay:
+                device_bays[device] = bay
+
+        # drives with drivetemp only need smartctl for health/attributes when refresh_smart is set,
+        # their temperature is read from sysfs every cycle after a power mode check. without the
+        # ioctl, smartctl -n standby does the check
+        smart_devices = []
+        power_states = {}
+        for device in device_bays:
+            cached = device in self.drivetemp and device in self.last_drive_samples
+            if refresh_smart or not cached:
+                smart_devices.append(device)
+            elif not SMART_STANDBY_CHECK:
+                power_states[device] = 'active'
+            elif (state := self.check_power_mode(device)) is not None:
+                power_states[device] = state
+            else:
+                smart_devices.append(device)
+        smart = self.query_smart(
+            smart_devices, brief=self.device_serials, standby_check=SMART_STANDBY_CHECK
+        )
 
-            size_bytes = data.get('user_capacity', {}).get('bytes', 0)
-            drive['total_size'] = round(size_bytes / (1024 ** 4), 2)
+        drives = []
+        current_drive_map = {}
+        now = time.time()
 
+        # merge in fixed bay order regardless of which smartctl finished first
+        for device, bay in sorted(device_bays.items(), key=lambda item: int(item[1])):
+            drive = self.build_drive(device, bay, smart.get(device), power_states.get(device))
+            if drive is None:
+                continue
+            drive.update(self.drive_io.get(device, {}))
             drives.append(drive)
-            current_drive_map[serial] = bay
+            if 'serial' in drive:
+                current_drive_map[drive['serial']] = bay
+
+        if self.bay_map_dirty:
+            self.save_bay_map()
+            self.bay_map_dirty = False
 
         # detect moved drives and remove old bay entities immediately
         for serial, old_bay in self.previous_drive_map.items():
@@ -402,6 +1778,8 @@ class UNASMonitor:
                 new_bay = current_drive_map[serial]
                 if old_bay != new_bay:
                     logger.info(f"Drive {serial} moved from bay {old_bay} to bay {new_bay}")
+                    if old_bay not in current_drive_map.values():
+                        self.stale_prefixes.append(f"{MQTT_HDD}/{old_bay}/")
 
         # detect removed drives and start grace period
         removed_serials = set(self.previous_drive_map.keys()) - set(current_drive_map.keys())
@@ -420,52 +1798,57 @@ class UNASMonitor:
             elif now - removed_time > self.grace_period:
                 logger.info(f"Drive {serial} grace period expired for bay {bay}")
                 del self.drive_removed_at[serial]
+                if bay not in current_drive_map.values():
+                    self.stale_prefixes.append(f"{MQTT_HDD}/{bay}/")
+
+        # drop identity of drives that are gone for good
+        for serial in list(self.drive_static):
+            if serial not in current_drive_map and serial not in self.drive_removed_at:
+                del self.drive_static[serial]
 
         self.previous_drive_map = current_drive_map
-        self.write_max_hdd_temp(max_temp)
         return drives
 
-    def get_nvme_drives(self):
-        nvmes = []
+    def get_nvme_drives(self, refresh_static=False):
+        devices = sorted(self.current_devices('nvme*n1'))
 
-        for device_path in sorted(Path('/dev').glob('nvme*n1')):
-            device = device_path.name
-            slot = device.replace('nvme', '').replace('n1', '')
+        for device in list(self.last_nvme_samples):
+            if device not in devices:
+                slot = self.last_nvme_samples.pop(device)['slot']
+                self.stale_prefixes.append(f"{MQTT_NVME}/{slot}/")
+        for device in list(self.smart_failures):
+            if device.startswith('nvme') and device not in devices:
+                del self.smart_failures[device]
 
-            output = self.run_cmd(['smartctl', '-a', '-j', f'/dev/{device}'])
-            if not output:
-                continue
+        if refresh_static or set(devices) != self.known_nvmes:
+            self.nvme_serials.clear()
+            self.nvme_static.clear()
+            self.known_nvmes = set(devices)
 
-            try:
-                data = json.loads(output)
-            except json.JSONDecodeError:
-                continue
-
-            if 'error' in data:
-                continue
+        smart = self.query_smart(devices, brief=self.nvme_serials)
 
-            health = data.get('nvme_smart_health_information_log', {})
-
-            nvme = {
-                'slot': slot,
-                'model': data.get('model_name', 'Unknown'),
-                'serial': data.get('serial_number', 'Unknown'),
-                'firmware': data.get('firmware_version', 'Unknown'),
-                'status': "Optimal",
-                'temperature': health.get('temperature', 0),
-                'power_on_hours': health.get('power_on_hours', 0),
-                'percentage_used': health.get('percentage_used', 0),
-                'available_spare': health.get('available_spare', 100),
-                'media_errors': health.get('media_errors', 0),
-                'unsafe_shutdowns': health.get('unsafe_shutdowns', 0)
-            }
-
-            size_bytes = data.get('user_capacity', {}).get('bytes', 0)
-            nvme['total_size'] = round(size_bytes / (1024 ** 4), 2)
+        nvmes = []
+        for device in devices:
+            slot = device.replace('nvme', '').replace('n1', '')
+            data = smart.get(device)
 
-            if health.get('critical_warning', 0) != 0 or health.get('available_spare', 100) < 10:
-                nvme['status'] = "Warning"
+            if data is None and self.smart_failed(device):
+                if (stale := self.last_nvme_samples.pop(device, None)) is not None:
+                    self.stale_prefixes.append(f"{MQTT_NVME}/{stale['slot']}/")
+                continue
+            if data is None:
+                if device not in self.last_nvme_samples:
+                    continue
+                nvme = dict(self.last_nvme_samples[device])
+            elif 'error' in data:
+                continue
+            else:
+                nvme = self.parse_nvme(
+                    slot, self.remember_identity(self.nvme_serials, self.nvme_static, device, data)
+                )
+                self.last_nvme_samples[device] = dict(nvme)
 
+            nvme.update(self.drive_io.get(device, {}))
             nvmes.append(nvme)
 
         return nvmes
@@ -478,14 +1861,16 @@ class UNASMonitor:
             if not volume_dir.is_dir():
                 continue
 
-            df_output = self.run_cmd(['df', '-BG', str(volume_dir)])
-            lines = df_output.strip().split('\n')
-
-            if len(lines) < 2:
+            try:
+                st = os.statvfs(volume_dir)
+            except OSError:
                 continue
 
-            parts = lines[1].split()
-            size_gb = int(parts[1].rstrip('G'))
+            # same numbers as df -BG: sizes rounded up to whole GiB, usage % rounded up
+            gib = 1024 ** 3
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            available = st.f_bavail * st.f_frsize
+            size_gb = math.ceil(st.f_blocks * st.f_frsize / gib)
 
             if size_gb <= 75:
                 continue
@@ -493,14 +1878,73 @@ class UNASMonitor:
             pools.append({
                 'pool': pool_num,
                 'size': size_gb,
-                'used': int(parts[2].rstrip('G')),
-                'available': int(parts[3].rstrip('G')),
-                'usage': int(parts[4].rstrip('%'))
+                'used': math.ceil(used / gib),
+                'available': math.ceil(available / gib),
+                'usage': math.ceil(used * 100 / (used + available)) if used + available else 0
             })
             pool_num += 1
 
         return pools
 
+    def get_smb_peers(self):
+        peers = set()
+        for proc in self.proc_tcp:
+            try:
+                peers.update(m.group(1) for m in proc.read().finditer(SMB_TCP_PEER))
+            except OSError:
+                if proc.path == '/proc/net/tcp':
+                    return None
+        return peers
+
+    def get_smb_sessions(self):
+        # one row per share connection: username, ip, share, protocol
+        if self.smb_json is not False:
+            output = self.run_cmd(['smbstatus', '--json'])
+            try:
+                status = json.loads(output)
+            except ValueError:
+                status = None
+            if isinstance(status, dict):
+                self.smb_json = True
+                return self.parse_smb_json(status)
+            if self.smb_json is None:
+                logger.info("smbstatus has no --json, falling back to the text output")
+                self.smb_json = False
+            else:
+                return self.smb_sessions
+
+        smb_connections = self.get_smb_connections()
+        sessions = []
+        for share in self.get_smb_shares():
+            conn = smb_connections.get(share['pid'], {})
+            sessions.append({
+                'username': conn.get('username', 'unknown'),
+                'ip': share['ip'],
+                'share': share['share'],
+                'protocol': conn.get('protocol', 'unknown')
+            })
+        return sessions
+
+    def parse_smb_json(self, status):
+        connections = {}
+        for session in status.get('sessions', {}).values():
+            pid = str(session.get('server_id', {}).get('pid', ''))
+            connections[pid] = {
+                'username': session.get('username', 'unknown'),
+                'protocol': session.get('session_dialect', 'unknown')
+            }
+
+        sessions = []
+        for tcon in status.get('tcons', {}).values():
+            conn = connections.get(str(tcon.get('server_id', {}).get('pid', '')), {})
+            sessions.append({
+                'username': conn.get('username', 'unknown'),
+                'ip': tcon.get('machine', ''),
+                'share': tcon.get('service', ''),
+                'protocol': conn.get('protocol', 'unknown')
+            })
+        return sessions
+
     def get_smb_connections(self):
         output = self.run_cmd(['smbstatus', '-b'])
         lines = output.strip().split('\n')
@@ -520,7 +1964,8 @@ class UNASMonitor:
 
             connections[pid] = {
                 'username': username,
-                'ip': ip
+                'ip': ip,
+                'protocol': next((p for p in parts[4:] if p.startswith(('SMB', 'NT1'))), 'unknown')
             }
 
         return connections
@@ -546,6 +1991,83 @@ class UNASMonitor:
 
         return shares
 
+    def get_nfsd_clients(self):
+        clients = []
+        for info_path in Path(NFSD_CLIENTS_DIR).glob('*/info'):
+            try:
+                info = {}
+                for line in info_path.read_text().splitlines():
+                    key, sep, value = line.partition(': ')
+                    if sep:
+                        info[key.strip()] = value.strip().strip('"')
+                # every open/lock/delegation stateid is one line, opens are what a client has in use
+                opens = (info_path.parent / 'states').read_bytes().count(b'type: open')
+            except OSError:
+                # client expired between the glob and the read
+                continue
+
+            # courtesy/unconfirmed clients hold state but aren't talking to us
+            if info.get('status', 'confirmed') != 'confirmed':
+                continue
+
+            clients.append({
+                'ip': info.get('address', '').rsplit(':', 1)[0].strip('[]'),
+                'version': f"4.{info.get('minor version', '0')}",
+                'opens': opens
+            })
+
+        return clients
+
+    def get_nfsd_rates(self):
+        try:
+            self.proc_nfsd.read()
+        except OSError:
+            # nfsd not loaded
+            return {}
+
+        proc3 = self.proc_nfsd.search(NFSD_PROC3)
+        proc4ops = self.proc_nfsd.search(NFSD_PROC4OPS)
+        io = self.proc_nfsd.search(NFSD_IO)
+        rpc = self.proc_nfsd.search(NFSD_RPC)
+        v3 = [int(v) for v in proc3.group(1).split()] if proc3 else []
+        v4 = [int(v) for v in proc4ops.group(1).split()] if proc4ops else []
+
+        def op(counts, index):
+            return counts[index] if len(counts) > index else 0
+
+        counters = (
+            int(rpc.group(1)) if rpc else 0,
+            op(v3, NFS3_READ) + op(v4, NFS4_OP_READ),
+            op(v3, NFS3_WRITE) + op(v4, NFS4_OP_WRITE),
+            int(io.group(1)) if io else 0,
+            int(io.group(2)) if io else 0,
+            sum(v3[1:]),  # v3 calls other than NULL pings
+        )
+
+        now = time.monotonic()
+        prev = self.prev_nfsd
+        if prev is not None and now - prev[0] < RATE_MIN_WINDOW:
+            return {}
+        self.prev_nfsd = (now, counters)
+        if prev is None:
+            return {}
+
+        window = now - prev[0]
+        calls, read_ops, write_ops, read_bytes, write_bytes, v3_calls = deltas = [
+            n - p for n, p in zip(counters, prev[1])
+        ]
+        if min(deltas) < 0:
+            # counters reset, nfsd was restarted
+            return {}
+        self.nfs3_active = v3_calls > 0
+        return {
+            'ops': round(calls / window, 1),
+            'read_ops': round(read_ops / window, 1),
+            'write_ops': round(write_ops / window, 1),
+            'read_speed': round(read_bytes / window / (1024 * 1024), 2),
+            'write_speed': round(write_bytes / window / (1024 * 1024), 2),
+        }
+
     def get_nfs_mounts(self):
         output = self.run_cmd(['showmount', '-a'])
         lines = output.strip().split('\n')[1:]
@@ -575,62 +2097,149 @@ class UNASMonitor:
 
         return mounts
 
-    def collect_and_publish(self):
-        system = self.get_system_metrics()
-        for key, value in system.items():
-            self.publish_system(key, value)
-
-        drives = self.get_drives()
-        for drive in drives:
-            bay = drive.pop('bay')
-            for key, value in drive.items():
-                self.publish_hdd(bay, key, value)
-
-        nvmes = self.get_nvme_drives()
-        for nvme in nvmes:
-            slot = nvme.pop('slot')
-            for key, value in nvme.items():
-                self.publish_nvme(slot, key, value)
-
-        pools = self.get_pools()
-        for pool in pools:
-            pool_num = pool.pop('pool')
-            for key, value in pool.items():
-                self.publish_pool(pool_num, key, value)
-
-        # UNVR doesn't have SMB/NFS shares
-        if DEVICE_MODEL != "UNVR":
-            smb_connections = self.get_smb_connections()
-            smb_shares = self.get_smb_shares()
-
-            smb_data = {
-                'count': len(smb_shares),
-                'clients': []
-            }
-
-            for share in smb_shares:
-                conn = smb_connections.get(share['pid'], {})
-                smb_data['clients'].append({
-                    'username': conn.get('username', 'unknown'),
-                    'ip': share['ip'],
-                    'share': share['share']
-                })
+    def publish_drive(self, drive, force=False):
+        data = {key: value for key, value in drive.items() if key != 'bay'}
+        self.publish_group(f"{MQTT_HDD}/{drive['bay']}", data, force)
+
+    def publish_nvme_drive(self, nvme, force=False):
+        data = {key: value for key, value in nvme.items() if key != 'slot'}
+        self.publish_group(f"{MQTT_NVME}/{nvme['slot']}", data, force)
+
+    def wait_for_device_node(self, device, timeout=2.0):
+        # the kernel uevent arrives before udev has created /dev/sdX
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(f'/dev/{device}'):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def drive_added(self, device):
+        self.known_drives.add(device)
+        self.bay_cache.pop(device, None)
+        self.device_serials.pop(device, None)
+        self.last_drive_samples.pop(device, None)
+        bay = self.get_bay_number(device)
+        self.save_bay_map()
+        self.bay_map_dirty = False
+        logger.info(f"Hotplug: /dev/{device} added (bay {bay})")
+
+        if not bay or not self.wait_for_device_node(device):
+            return
+
+        self.drivetemp.refresh(self.known_drives)
+        smart = self.query_smart([device], standby_check=SMART_STANDBY_CHECK)
+        drive = self.build_drive(device, bay, smart.get(device))
+        if drive is None:
+            # not readable yet, the next regular cycle will retry
+            return
+        if 'serial' not in drive:
+            # asleep and never read in this bay, published without identity until it wakes
+            self.publish_drive(drive, force=True)
+            return
+
+        serial = drive['serial']
+        if serial in self.drive_removed_at:
+            logger.info(f"Drive {serial} reconnected to bay {bay} within grace period")
+            del self.drive_removed_at[serial]
+        self.previous_drive_map[serial] = bay
+        self.publish_drive(drive, force=True)
+        samples = self.last_drive_samples.values()
+        self.share_temperatures(
+            'hdd', {d['bay']: d['temperature'] for d in samples if 'temperature' in d}
+        )
 
-            self.mqtt.publish(f"{MQTT_SMB}/connections", str(smb_data['count']), retain=True)
-            self.mqtt.publish(f"{MQTT_SMB}/clients", json.dumps(smb_data['clients']), retain=True)
+    def drive_removed(self, device):
+        self.known_drives.discard(device)
+        self.bay_cache.pop(device, None)
+        self.device_serials.pop(device, None)
+        self.spin_states.pop(device, None)
+        self.save_bay_map()
+        self.drivetemp.refresh(self.known_drives)
+        logger.info(f"Hotplug: /dev/{device} removed")
+
+        # start the grace period now rather than at the next cycle
+        drive = self.last_drive_samples.pop(device, None)
+        if drive and drive.get('serial') in self.previous_drive_map:
+            serial = drive['serial']
+            bay = self.previous_drive_map.pop(serial)
+            if serial not in self.drive_removed_at:
+                logger.info(
+                    f"Drive {serial} removed from bay {bay}, "
+                    f"starting {self.grace_period}s grace period"
+                )
+                self.drive_removed_at[serial] = (time.time(), bay)
+
+    def nvme_added(self, device):
+        self.nvme_serials.pop(device, None)
+        self.last_nvme_samples.pop(device, None)
+        self.known_nvmes.add(device)
+        logger.info(f"Hotplug: /dev/{device} added")
+
+        if not self.wait_for_device_node(device):
+            return
+
+        data = self.query_smart([device]).get(device)
+        if data is None or 'error' in data:
+            return
+
+        slot = device.replace('nvme', '').replace('n1', '')
+        nvme = self.parse_nvme(
+            slot, self.remember_identity(self.nvme_serials, self.nvme_static, device, data)
+        )
+        self.last_nvme_samples[device] = dict(nvme)
+        self.publish_nvme_drive(nvme, force=True)
+
+    def handle_hotplug(self, action, device):
+        with self.drive_lock:
+            if action == 'rescan':
+                self.block_devices = self.scan_block_devices()
+                return
+            if action == 'disable':
+                self.hotplug_enabled = False
+                return
+
+            if action == 'add':
+                self.block_devices.add(device)
+                if device.startswith('sd'):
+                    self.drive_added(device)
+                else:
+                    self.nvme_added(device)
+            elif action == 'remove':
+                self.block_devices.discard(device)
+                if device.startswith('sd'):
+                    self.drive_removed(device)
+                else:
+                    self.known_nvmes.discard(device)
+                    if (nvme := self.last_nvme_samples.pop(device, None)) is not None:
+                        self.stale_prefixes.append(f"{MQTT_NVME}/{nvme['slot']}/")
+                    logger.info(f"Hotplug: /dev/{device} removed")
+        self.clear_stale_topics()
+
+    def collect_system(self, full):
+        system = self.get_system_metrics(refresh_static=self.tier_due('hour', 'system'))
+        with self.timings.timed('publish'):
+            self.publish_group(MQTT_SYSTEM, system, full)
+
+        if not self.first_publish_done:
+            self.first_publish_done = True
+            logger.info(f"Time to first publish: {time.monotonic() - self.started_at:.2f}s")
+
+        self.adapt_interval(
+            'system', [system['cpu_temp']], [io['busy'] for io in self.drive_io.values()]
+        )
+        self.share_temperatures('cpu', {0: system['cpu_temp']})
 
-            nfs_mounts = self.get_nfs_mounts()
-            nfs_data = {
-                'count': len(nfs_mounts),
-                'clients': nfs_mounts
-            }
+        with self.timings.timed('publish'):
+            for iface, net in self.net_io.items():
+                self.publish_group(f"{MQTT_NET}/{iface}", net, full)
 
-            self.mqtt.publish(f"{MQTT_NFS}/mounts", str(nfs_data['count']), retain=True)
-            self.mqtt.publish(f"{MQTT_NFS}/clients", json.dumps(nfs_data['clients']), retain=True)
+        # drive temperatures come from the drive collectors' latest runs
+        drives = sorted(list(self.last_drive_samples.values()), key=lambda d: d['bay'])
+        nvmes = list(self.last_nvme_samples.values())
+        drive_temps = [d['temperature'] for d in drives if 'temperature' in d]
+        nvme_temps = [n['temperature'] for n in nvmes if 'temperature' in n]
 
-        drive_temps = [d.get('temperature', 0) for d in drives if 'temperature' in d]
-        nvme_temps = [n.get('temperature', 0) for n in nvmes if 'temperature' in n]
-        
         hdd_str = ', '.join(f"{t}°C" for t in drive_temps) if drive_temps else "no drives"
         nvme_str = f" | NVMe {', '.join(f'{t}°C' for t in nvme_temps)}" if nvme_temps else ""
 
@@ -638,26 +2247,254 @@ class UNASMonitor:
             f"{system['fan_speed']} PWM ({system['fan_speed_percent']}%) | "
             f"CPU {system['cpu_temp']}°C | "
             f"HDD {hdd_str}{nvme_str} | "
-            f"R: {system['disk_read']} MB/s W: {system['disk_write']} MB/s"
+            f"R: {system.get('disk_read', 0)} MB/s W: {system.get('disk_write', 0)} MB/s | "
+            f"RX: {system.get('network_rx', 0)} MB/s TX: {system.get('network_tx', 0)} MB/s"
         )
 
-    def run(self):
-        logger.info(f"UNAS monitor started (interval: {self.monitor_interval}s)")
-        
-        # write initial interval to shared file for fan control script
+    def collect_hdd(self, full):
+        with self.drive_lock:
+            drives = self.get_drives(
+                refresh_static=self.tier_due('hour', 'hdd'),
+                refresh_smart=self.tier_due('minute', 'hdd'),
+            )
+        with self.timings.timed('publish'):
+            for drive in drives:
+                self.publish_drive(drive, full)
+            self.clear_stale_topics()
+        self.adapt_interval(
+            'hdd',
+            [d['temperature'] for d in drives if 'temperature' in d],
+            [d.get('busy', 0) for d in drives],
+        )
+        self.share_temperatures(
+            'hdd', {d['bay']: d['temperature'] for d in drives if 'temperature' in d}
+        )
+        self.write_monitor_interval()
+
+    def collect_nvme(self, full):
+        with self.drive_lock:
+            nvmes = self.get_nvme_drives(refresh_static=self.tier_due('hour', 'nvme'))
+        with self.timings.timed('publish'):
+            for nvme in nvmes:
+                self.publish_nvme_drive(nvme, full)
+            self.clear_stale_topics()
+        self.adapt_interval(
+            'nvme',
+            [n['temperature'] for n in nvmes if 'temperature' in n],
+            [n.get('busy', 0) for n in nvmes],
+        )
+        self.share_temperatures(
+            'nvme', {n['slot']: n['temperature'] for n in nvmes if 'temperature' in n}
+        )
+
+    def collect_pool(self, full):
+        pools = self.get_pools()
+        for pool_num in range(len(pools) + 1, len(self.pools) + 1):
+            self.stale_prefixes.append(f"{MQTT_POOL}/{pool_num}/")
+        self.pools = pools
+        with self.timings.timed('publish'):
+            for pool in self.pools:
+                data = {key: value for key, value in pool.items() if key != 'pool'}
+                self.publish_group(f"{MQTT_POOL}/{pool['pool']}", data, full)
+            self.clear_stale_topics()
+
+    def collect_smb(self, full):
+        peers = self.get_smb_peers()
+        now = time.monotonic()
+        if (peers is None or peers != self.smb_peers or self.smb_refreshed_at is None
+                or now - self.smb_refreshed_at >= SMB_REFRESH_INTERVAL):
+            self.smb_sessions = self.get_smb_sessions()
+            self.smb_peers = peers
+            self.smb_refreshed_at = now
+
+        shares = {}
+        for session in self.smb_sessions:
+            shares[session['share']] = shares.get(session['share'], 0) + 1
+
+        smb_data = {
+            'connections': len(self.smb_sessions),
+            'clients': self.smb_sessions,
+            'shares': shares
+        }
+
+        with self.timings.timed('publish'):
+            self.publish_group(MQTT_SMB, smb_data, full)
+
+    def collect_nfs(self, full):
+        rates = self.get_nfsd_rates()
+
+        if os.path.isdir(NFSD_CLIENTS_DIR):
+            nfs_mounts = self.get_nfsd_clients()
+            if not self.nfs3_active:
+                self.nfs3_clients = []
+            elif self.tier_due('minute', 'nfs3'):
+                v4_ips = {client['ip'] for client in nfs_mounts}
+                self.nfs3_clients = [
+                    dict(mount, version='3')
+                    for mount in self.get_nfs_mounts() if mount['ip'] not in v4_ips
+                ]
+            nfs_mounts += self.nfs3_clients
+        else:
+            # older kernels: mountd is all there is
+            nfs_mounts = self.get_nfs_mounts()
+
+        nfs_data = {
+            'count': len(nfs_mounts),
+            'clients': nfs_mounts
+        }
+
+        with self.timings.timed('publish'):
+            self.publish_group(
+                MQTT_NFS,
+                {'mounts': nfs_data['count'], 'clients': nfs_data['clients'], **rates},
+                full,
+            )
+
+    def publish_diag(self, full):
+        summary = self.timings.summary()
+        data = {'overruns': self.overruns}
+        for name in ADAPTIVE_COLLECTORS:
+            if name in self.collectors:
+                data[f"{name}_interval"] = self.collector_interval(name)
+        for name, (p50, p95, peak) in summary.items():
+            data[f"{name}_p50"], data[f"{name}_p95"], data[f"{name}_max"] = p50, p95, peak
+
+        collectors = {name: summary[name] for name in self.collectors if name in summary}
+        if collectors:
+            slowest = max(collectors, key=lambda name: collectors[name][1])
+            data['slowest_collector'] = slowest
+            data['slowest_collector_p95'] = collectors[slowest][1]
+
+        self.publish_group(MQTT_DIAG, data, full)
+
+    def run_timed(self, name, full):
+        with self.timings.timed(name):
+            getattr(self, f'collect_{name}')(full)
+
+    async def run_collector(self, name, full):
+        loop = asyncio.get_running_loop()
+        timeout = COLLECTOR_TIMEOUTS[name]
+        future = loop.run_in_executor(self.collector_pool, self.run_timed, name, full)
         try:
-            with open(MONITOR_INTERVAL_FILE, 'w') as f:
-                f.write(str(self.monitor_interval))
-        except OSError:
-            pass
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except TimeoutError:
+            logger.warning(
+                f"{name} collector missed its {timeout}s deadline, skipping it until it returns"
+            )
+            # a thread can't be cancelled: keep this task pending so the collector is never stacked
+            try:
+                await future
+            except Exception as e:
+                logger.error(f"{name} collector error: {e}")
+        except Exception as e:
+            logger.error(f"{name} collector error: {e}")
+
+    async def time_cycle(self, started, tasks):
+        # a cycle lasts until the last collector launched on its tick has returned
+        await asyncio.gather(*tasks)
+        self.timings.record('cycle', time.monotonic() - started)
+
+    def tick(self):
+        started = time.monotonic()
+        # publishing can block on publish_lock behind a collector, keep it off the event loop thread
+        switching = self.wire_format_switch is not None and not self.wire_format_switch.done()
+        if self.requested_wire_format != self.wire_format and not switching:
+            self.wire_format_switch = self.aux_pool.submit(self.switch_wire_format)
+
+        if (
+            self.full_publish_requested
+            or self.full_published_at is None
+            or started - self.full_published_at >= FULL_PUBLISH_CYCLES * self.monitor_interval
+        ):
+            self.full_publish_requested = False
+            self.full_published_at = started
+            self.full_pending = set(self.collectors) | {'diag'}
+
+        if self.backlog_flush_requested and self.mqtt_connected.is_set():
+            self.backlog_flush_requested = False
+            self.aux_pool.submit(self.flush_backlog)
+
+        if time.monotonic() - self.history_saved_at >= HISTORY_SAVE_INTERVAL:
+            self.history_saved_at = time.monotonic()
+            self.aux_pool.submit(self.history.save, HISTORY_FILE, HISTORY_HOURS_FILE)
+
+        if self.tier_due('minute', 'diag'):
+            self.aux_pool.submit(self.publish_diag, 'diag' in self.full_pending)
+            self.full_pending.discard('diag')
+
+        launched = []
+        for name in self.collectors:
+            due = self.next_run(name, started)
+            if started < due:
+                continue
+            # fixed rate: the next run counts from when this one was due, not from when it started.
+            # runs missed while the loop was stalled are counted and skipped, not run back to back
+            interval = self.collector_interval(name)
+            missed = int((started - due) // interval)
+            if missed:
+                self.overruns += missed
+                logger.warning(f"{name} collector fell {missed} run(s) behind, skipping them")
+            self.collector_runs[name] = due + missed * interval
+
+            task = self.collector_tasks.get(name)
+            if task is not None and not task.done():
+                self.overruns += 1
+                logger.warning(f"{name} collector still running, skipping it this tick")
+                continue
 
+            tier = COLLECTOR_TIERS.get(name)
+            if tier and not self.tier_due(tier, name):
+                continue
+
+            full = name in self.full_pending
+            self.full_pending.discard(name)
+            self.collector_tasks[name] = asyncio.ensure_future(self.run_collector(name, full))
+            launched.append(self.collector_tasks[name])
+
+        if launched:
+            asyncio.ensure_future(self.time_cycle(started, launched))
+
+    def next_run(self, name, now):
+        # a collector that hasn't run yet is due right away
+        last = self.collector_runs.get(name)
+        return now if last is None else last + self.collector_interval(name)
+
+    async def schedule(self):
+        # each collector runs at a fixed rate off the monotonic clock on its own interval (all the
+        # same one unless adaptive), so periods don't stretch by the collection time. the loop wakes
+        # for whichever is due next
         while True:
+            self.tick()
+            now = time.monotonic()
+            next_due = min(self.next_run(name, now) for name in self.collectors)
+            await asyncio.sleep(max(0.0, next_due - now))
+
+    def queue_hotplug_event(self, event):
+        # called on the watcher thread
+        self.loop.call_soon_threadsafe(self.hotplug_events.put_nowait, event)
+
+    async def watch_hotplug(self):
+        # drive add/remove events are handled as they arrive, independent of the tick
+        while self.hotplug_enabled:
+            action, device = await self.hotplug_events.get()
             try:
-                self.collect_and_publish()
+                await self.loop.run_in_executor(self.aux_pool, self.handle_hotplug, action, device)
             except Exception as e:
-                logger.error(f"Error: {e}")
+                logger.error(f"Hotplug error: {e}")
+
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        if self.hotplug_enabled:
+            self.hotplug_events = asyncio.Queue()
+            self.hotplug_watcher.start()
+            self.hotplug_task = asyncio.ensure_future(self.watch_hotplug())
+        await self.schedule()
+
+    def run(self):
+        logger.info(f"UNAS monitor started (interval: {self.monitor_interval}s)")
+        self.write_monitor_interval()
 
-            time.sleep(self.monitor_interval)
+        asyncio.run(self.run_async())
 
 
 if __name__ == '__main__':
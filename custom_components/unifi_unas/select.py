@@ -20,6 +20,16 @@ _LOGGER = logging.getLogger(__name__)
 
 MODE_CUSTOM_CURVE = "Custom Curve"
 MODE_SET_SPEED = "Set Speed"
+MODE_PID = "PID"
+
+# fan_control's aggregation policies for the temperature the curve/pid modes follow
+FAN_POLICIES = {
+    "Hottest Drive": "max",
+    "Drive Average": "mean",
+    "Second-Hottest Drive": "second",
+    "Per-Class Curves": "weighted",
+}
+DEFAULT_FAN_POLICY = "Hottest Drive"
 
 
 async def async_setup_entry(
@@ -28,7 +38,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     coordinator: UNASDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-    async_add_entities([UNASFanModeSelect(coordinator, hass)])
+    async_add_entities(
+        [UNASFanModeSelect(coordinator, hass), UNASFanPolicySelect(coordinator, hass)])
 
 
 class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
@@ -46,7 +57,7 @@ class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
 
         device_name, device_model = get_device_info(coordinator.entry.data[CONF_DEVICE_MODEL])
         self._mode_managed = f"{device_name} Managed"
-        self._attr_options = [self._mode_managed, MODE_CUSTOM_CURVE, MODE_SET_SPEED]
+        self._attr_options = [self._mode_managed, MODE_CUSTOM_CURVE, MODE_PID, MODE_SET_SPEED]
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, coordinator.entry.entry_id)},
             name=device_name,
@@ -64,6 +75,8 @@ class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
             mqtt_mode = "unas_managed"
             if self._current_option == MODE_CUSTOM_CURVE:
                 mqtt_mode = "auto"
+            elif self._current_option == MODE_PID:
+                mqtt_mode = "pid"
             elif self._current_option == MODE_SET_SPEED:
                 mqtt_mode = str(self._last_pwm or DEFAULT_FAN_SPEED_50_PCT)
                 self._last_pwm = self._last_pwm or DEFAULT_FAN_SPEED_50_PCT
@@ -81,6 +94,8 @@ class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
                 self._current_option = self._mode_managed
             elif payload == "auto":
                 self._current_option = MODE_CUSTOM_CURVE
+            elif payload == "pid":
+                self._current_option = MODE_PID
             elif payload.isdigit():
                 self._current_option = MODE_SET_SPEED
                 try:
@@ -136,6 +151,8 @@ class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
             await self._publish_mode("unas_managed")
         elif option == MODE_CUSTOM_CURVE:
             await self._publish_mode("auto")
+        elif option == MODE_PID:
+            await self._publish_mode("pid")
         elif option == MODE_SET_SPEED:
             mqtt_data = self.coordinator.mqtt_client.get_data()
             current_speed = mqtt_data.get("unas_fan_speed", DEFAULT_FAN_SPEED_50_PCT)
@@ -144,3 +161,76 @@ class UNASFanModeSelect(CoordinatorEntity, SelectEntity, RestoreEntity):
 
         self._current_option = option
         self.async_write_ha_state()
+
+
+class UNASFanPolicySelect(CoordinatorEntity, SelectEntity):
+    def __init__(self, coordinator: UNASDataUpdateCoordinator, hass: HomeAssistant) -> None:
+        super().__init__(coordinator)
+        self.hass = hass
+        self._topics = get_mqtt_topics(coordinator.entry.entry_id)
+        self._attr_has_entity_name = True
+        self._attr_name = "Fan Temperature Policy"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_fan_policy"
+        self._attr_icon = "mdi:thermometer-lines"
+        self._attr_options = list(FAN_POLICIES)
+        self._current_option = None
+        self._unsubscribe = None
+        self._mqtt_topic = f"{self._topics['control']}/fan/policy"
+
+        device_name, device_model = get_device_info(coordinator.entry.data[CONF_DEVICE_MODEL])
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.entry.entry_id)},
+            name=device_name,
+            manufacturer="Ubiquiti",
+            model=device_model,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+
+        @callback
+        def message_received(msg):
+            for option, policy in FAN_POLICIES.items():
+                if msg.payload == policy:
+                    self._current_option = option
+                    self.async_write_ha_state()
+                    return
+
+        self._unsubscribe = await mqtt.async_subscribe(
+            self.hass, self._mqtt_topic, message_received, qos=0
+        )
+
+        self.hass.loop.call_later(2.0, self._maybe_init_default)
+
+    def _maybe_init_default(self) -> None:
+        if self._current_option is None:
+            self._current_option = DEFAULT_FAN_POLICY
+            self.hass.async_create_task(self._publish_policy(DEFAULT_FAN_POLICY))
+            self.async_write_ha_state()
+
+    async def _publish_policy(self, option: str) -> None:
+        try:
+            await mqtt.async_publish(
+                self.hass, self._mqtt_topic, FAN_POLICIES[option], qos=0, retain=True)
+        except Exception as err:
+            _LOGGER.error("Failed to publish fan policy: %s", err)
+
+    @property
+    def available(self) -> bool:
+        mqtt_available = self.coordinator.mqtt_client.is_available()
+        service_running = self.coordinator.data.get("fan_control_running", False)
+        return mqtt_available and service_running and self._current_option is not None
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._unsubscribe:
+            self._unsubscribe()
+        await super().async_will_remove_from_hass()
+
+    @property
+    def current_option(self) -> str | None:
+        return self._current_option
+
+    async def async_select_option(self, option: str) -> None:
+        await self._publish_policy(option)
+        self._current_option = option
+        self.async_write_ha_state()
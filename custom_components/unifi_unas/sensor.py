@@ -10,7 +10,9 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     PERCENTAGE,
+    UnitOfDataRate,
     UnitOfTemperature,
     UnitOfTime,
     UnitOfInformation,
@@ -22,6 +24,7 @@ from homeassistant.helpers.device_registry import DeviceInfo
 
 from . import UNASDataUpdateCoordinator
 from .const import CONF_DEVICE_MODEL, DOMAIN, get_device_info
+from .fan_curve import curve_pwm, get_curve, pwm_to_percent
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +46,73 @@ UNAS_SENSORS = [
         SensorStateClass.MEASUREMENT,
         "mdi:chip",
     ),
+    (
+        "unas_cpu_core_max",
+        "CPU Busiest Core",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:chip",
+    ),
+    (
+        "unas_cpu_iowait",
+        "CPU IO Wait",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-sand",
+    ),
+    (
+        "unas_cpu_softirq",
+        "CPU SoftIRQ",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:lightning-bolt",
+    ),
+    ("unas_load_1m", "Load Average (1m)", None, None, SensorStateClass.MEASUREMENT, "mdi:gauge"),
+    ("unas_load_5m", "Load Average (5m)", None, None, SensorStateClass.MEASUREMENT, "mdi:gauge"),
+    ("unas_load_15m", "Load Average (15m)", None, None, SensorStateClass.MEASUREMENT, "mdi:gauge"),
+    (
+        "unas_cpu_pressure_some",
+        "CPU Pressure",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:chip",
+    ),
+    (
+        "unas_memory_pressure_some",
+        "Memory Pressure",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:memory",
+    ),
+    (
+        "unas_memory_pressure_full",
+        "Memory Pressure (full)",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:memory",
+    ),
+    (
+        "unas_io_pressure_some",
+        "IO Pressure",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:harddisk",
+    ),
+    (
+        "unas_io_pressure_full",
+        "IO Pressure (full)",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:harddisk",
+    ),
     (
         "unas_fan_speed",
         "Fan Speed (PWM)",
@@ -99,6 +169,22 @@ UNAS_SENSORS = [
         SensorStateClass.MEASUREMENT,
         "mdi:upload",
     ),
+    (
+        "unas_network_rx",
+        "Network Receive",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:download-network",
+    ),
+    (
+        "unas_network_tx",
+        "Network Transmit",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:upload-network",
+    ),
     (
         "unas_smb_connections",
         "SMB Connections",
@@ -115,6 +201,46 @@ UNAS_SENSORS = [
         SensorStateClass.MEASUREMENT,
         "mdi:folder-network",
     ),
+    (
+        "unas_nfs_ops",
+        "NFS Operations",
+        "ops/s",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:folder-network",
+    ),
+    (
+        "unas_nfs_read_ops",
+        "NFS Read Operations",
+        "ops/s",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:folder-network",
+    ),
+    (
+        "unas_nfs_write_ops",
+        "NFS Write Operations",
+        "ops/s",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:folder-network",
+    ),
+    (
+        "unas_nfs_read_speed",
+        "NFS Read",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:download-network",
+    ),
+    (
+        "unas_nfs_write_speed",
+        "NFS Write",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:upload-network",
+    ),
     (
         "unas_uptime",
         "Uptime",
@@ -128,6 +254,111 @@ UNAS_SENSORS = [
     ("unas_protect_version", "UniFi Protect Version", None, None, None, "mdi:information"),
 ]
 
+# monitor self-instrumentation, published once a minute under diag/
+DIAG_SENSORS = [
+    (
+        "unas_diag_cycle_p50",
+        "Cycle Duration",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+    (
+        "unas_diag_cycle_p95",
+        "Cycle Duration (p95)",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+    (
+        "unas_diag_cycle_max",
+        "Cycle Duration (max)",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+    ("unas_diag_slowest_collector", "Slowest Collector", None, None, None, "mdi:speedometer-slow"),
+    (
+        "unas_diag_slowest_collector_p95",
+        "Slowest Collector Duration (p95)",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+    (
+        "unas_diag_overruns",
+        "Overruns",
+        None,
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+        "mdi:timer-alert-outline",
+    ),
+    # effective per-collector sampling intervals, below the polling interval only in adaptive mode
+    (
+        "unas_diag_system_interval",
+        "System Sampling Interval",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-sync-outline",
+    ),
+    (
+        "unas_diag_hdd_interval",
+        "HDD Sampling Interval",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-sync-outline",
+    ),
+    (
+        "unas_diag_nvme_interval",
+        "NVMe Sampling Interval",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-sync-outline",
+    ),
+]
+
+# fan_control pid mode state, published under fan/pid while the mode is active
+FAN_PID_SENSORS = [
+    (
+        "unas_fan_pid_output",
+        "Fan PID Output",
+        None,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:fan-chevron-up",
+    ),
+    # temperature minus target, a difference so no temperature device class (no °F conversion)
+    (
+        "unas_fan_pid_error",
+        "Fan PID Error",
+        "°C",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:thermometer-alert",
+    ),
+    ("unas_fan_pid_i", "Fan PID Integral", None, None, SensorStateClass.MEASUREMENT, "mdi:sigma"),
+]
+
+# the temperature fan_control's curve/pid modes follow, after the temperature policy picked it
+FAN_INPUT_SENSORS = [
+    (
+        "unas_fan_input_temperature",
+        "Fan Control Temperature",
+        UnitOfTemperature.CELSIUS,
+        SensorDeviceClass.TEMPERATURE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:thermometer-auto",
+    ),
+    ("unas_fan_input_source", "Fan Control Source", None, None, None, "mdi:thermometer-lines"),
+]
+
 # storage pool sensor patterns (will be created dynamically for each pool)
 STORAGE_POOL_SENSORS = [
     (
@@ -163,6 +394,101 @@ STORAGE_POOL_SENSORS = [
         None,
     ),
 ]
+
+# network port sensor patterns (created dynamically for each physical interface)
+NETWORK_INTERFACE_SENSORS = [
+    (
+        "rx_speed",
+        "Receive",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:download-network",
+    ),
+    (
+        "tx_speed",
+        "Transmit",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:upload-network",
+    ),
+    (
+        "rx_packets",
+        "Receive Packets",
+        "packets/s",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:swap-vertical",
+    ),
+    (
+        "tx_packets",
+        "Transmit Packets",
+        "packets/s",
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:swap-vertical",
+    ),
+    ("errors", "Errors", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:alert-circle"),
+    ("drops", "Drops", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:package-variant-remove"),
+    (
+        "link_speed",
+        "Link Speed",
+        UnitOfDataRate.MEGABITS_PER_SECOND,
+        SensorDeviceClass.DATA_RATE,
+        None,
+        "mdi:ethernet",
+    ),
+    (
+        "utilization",
+        "Link Utilization",
+        PERCENTAGE,
+        None,
+        SensorStateClass.MEASUREMENT,
+        "mdi:gauge",
+    ),
+]
+
+# per-drive iostat metrics, shared by HDD bays and NVMe slots
+DRIVE_IO_SENSORS = [
+    (
+        "read_speed",
+        "Read Speed",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:download",
+    ),
+    (
+        "write_speed",
+        "Write Speed",
+        "MB/s",
+        SensorDeviceClass.DATA_RATE,
+        SensorStateClass.MEASUREMENT,
+        "mdi:upload",
+    ),
+    ("read_iops", "Read IOPS", "IOPS", None, SensorStateClass.MEASUREMENT, "mdi:swap-vertical"),
+    ("write_iops", "Write IOPS", "IOPS", None, SensorStateClass.MEASUREMENT, "mdi:swap-vertical"),
+    ("busy", "Utilization", PERCENTAGE, None, SensorStateClass.MEASUREMENT, "mdi:gauge"),
+    ("queue_depth", "Queue Depth", None, None, SensorStateClass.MEASUREMENT, "mdi:tray-full"),
+    (
+        "read_latency",
+        "Read Latency",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+    (
+        "write_latency",
+        "Write Latency",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        SensorStateClass.MEASUREMENT,
+        "mdi:timer-outline",
+    ),
+]
+
 DRIVE_SENSORS = [
     (
         "temperature",
@@ -187,6 +513,8 @@ DRIVE_SENSORS = [
         None,
     ),
     ("bad_sectors", "Bad Sectors", None, None, None, "mdi:alert-circle"),
+    ("spin_state", "Spin State", None, None, None, "mdi:power-sleep"),
+    *DRIVE_IO_SENSORS,
 ]
 
 NVME_SENSORS = [
@@ -215,6 +543,7 @@ NVME_SENSORS = [
     ("available_spare", "Available Spare", PERCENTAGE, None, SensorStateClass.MEASUREMENT, "mdi:database"),
     ("media_errors", "Media Errors", None, None, None, "mdi:alert-circle"),
     ("unsafe_shutdowns", "Unsafe Shutdowns", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:power"),
+    *DRIVE_IO_SENSORS,
 ]
 
 
@@ -227,13 +556,23 @@ async def async_setup_entry(
     device_model = entry.data[CONF_DEVICE_MODEL]
 
     if device_model == "UNVR":
-        excluded = {"unas_smb_connections", "unas_nfs_mounts", "unas_drive_version"}
+        excluded = {
+            "unas_smb_connections",
+            "unas_nfs_mounts",
+            "unas_nfs_ops",
+            "unas_nfs_read_ops",
+            "unas_nfs_write_ops",
+            "unas_nfs_read_speed",
+            "unas_nfs_write_speed",
+            "unas_drive_version",
+        }
     else:
         excluded = {"unas_protect_version"}
 
     entities = []
 
-    for mqtt_key, name, unit, device_class, state_class, icon in UNAS_SENSORS:
+    sensors = UNAS_SENSORS + DIAG_SENSORS + FAN_PID_SENSORS + FAN_INPUT_SENSORS
+    for mqtt_key, name, unit, device_class, state_class, icon in sensors:
         if mqtt_key not in excluded:
             entities.append(
                 UNASSensor(coordinator, mqtt_key, name, unit, device_class, state_class, icon))
@@ -250,6 +589,7 @@ async def async_setup_entry(
             await _discover_and_add_drive_sensors(coordinator, async_add_entities)
             await _discover_and_add_nvme_sensors(coordinator, async_add_entities)
             await _discover_and_add_pool_sensors(coordinator, async_add_entities)
+            await _discover_and_add_interface_sensors(coordinator, async_add_entities)
 
             if coordinator.discovered_bays or coordinator.discovered_nvmes or coordinator.discovered_pools:
                 break
@@ -433,6 +773,35 @@ async def _discover_and_add_pool_sensors(
         _LOGGER.info("Added %d sensors for %d new pools", len(entities), len(new_pools))
 
 
+async def _discover_and_add_interface_sensors(
+        coordinator: UNASDataUpdateCoordinator,
+        async_add_entities: AddEntitiesCallback,
+) -> None:
+    mqtt_data = coordinator.mqtt_client.get_data()
+    detected_interfaces = {key[len("unas_net_"):-len("_link_speed")] for key in mqtt_data.keys() if
+                           key.startswith("unas_net_") and key.endswith("_link_speed")}
+
+    new_interfaces = detected_interfaces - coordinator.discovered_interfaces
+    if not new_interfaces:
+        return
+
+    _LOGGER.debug("Discovered new network interfaces: %s", sorted(new_interfaces))
+
+    entities = []
+    for iface in sorted(new_interfaces):
+        for sensor_suffix, name, unit, device_class, state_class, icon in NETWORK_INTERFACE_SENSORS:
+            mqtt_key = f"unas_net_{iface}_{sensor_suffix}"
+            full_name = f"{iface} {name}"
+            entities.append(
+                UNASSensor(coordinator, mqtt_key, full_name, unit, device_class, state_class, icon))
+
+    if entities:
+        async_add_entities(entities)
+        coordinator.discovered_interfaces.update(new_interfaces)
+        _LOGGER.info(
+            "Added %d sensors for %d network interfaces", len(entities), len(new_interfaces))
+
+
 class UNASSensor(CoordinatorEntity, SensorEntity):
     def __init__(
             self,
@@ -456,9 +825,11 @@ class UNASSensor(CoordinatorEntity, SensorEntity):
             self._attr_icon = icon
         if device_class == SensorDeviceClass.TEMPERATURE:
             self._attr_suggested_display_precision = 0
-        if device_class == SensorDeviceClass.DURATION:
+        if device_class == SensorDeviceClass.DURATION and unit == UnitOfTime.SECONDS:
             # uptime
             self._attr_suggested_unit_of_measurement = UnitOfTime.DAYS
+        if mqtt_key.startswith(("unas_diag_", "unas_fan_pid_")):
+            self._attr_entity_category = EntityCategory.DIAGNOSTIC
         if device_class == SensorDeviceClass.DATA_SIZE:
             # storage pools
             if unit == "GB":
@@ -483,6 +854,13 @@ class UNASSensor(CoordinatorEntity, SensorEntity):
         attr_key = f"{self._mqtt_key}_attributes"
         if attr_key in mqtt_data:
             self._attr_extra_state_attributes = {"clients": mqtt_data[attr_key]}
+            # SMB: sessions per share
+            if (shares := mqtt_data.get(f"{self._mqtt_key}_shares")) is not None:
+                self._attr_extra_state_attributes["shares"] = shares
+
+        # CPU: usage per core
+        if (cores := mqtt_data.get(f"{self._mqtt_key}_cores")) is not None:
+            self._attr_extra_state_attributes = {"cores": cores}
 
         self.async_write_ha_state()
 
@@ -521,14 +899,17 @@ class UNASFanCurveVisualizationSensor(CoordinatorEntity, SensorEntity):
     def _update_state(self) -> None:
         mqtt_data = self.coordinator.data.get("mqtt_data", {})
 
-        min_temp = mqtt_data.get("fan_curve_min_temp", 43)
-        max_temp = mqtt_data.get("fan_curve_max_temp", 47)
-        min_fan = mqtt_data.get("fan_curve_min_fan", 204)
-        max_fan = mqtt_data.get("fan_curve_max_fan", 255)
+        # the curve fan_control runs: the multi-point document, or the two-point curve from the
+        # four params
+        points = get_curve(mqtt_data)
+        if points is None:
+            return
+
+        (min_temp, min_fan), (max_temp, max_fan) = points[0], points[-1]
 
         # convert PWM to percentage for display
-        min_fan_pct = round((min_fan * 100) / 255)
-        max_fan_pct = round((max_fan * 100) / 255)
+        min_fan_pct = pwm_to_percent(min_fan)
+        max_fan_pct = pwm_to_percent(max_fan)
 
         # state: summary string
         self._attr_native_value = (
@@ -536,8 +917,9 @@ class UNASFanCurveVisualizationSensor(CoordinatorEntity, SensorEntity):
         )
 
         # generate curve points for charting (temp, fan%)
-        curve_points = self._generate_curve_points(min_temp, max_temp, min_fan, max_fan)
+        curve_points = self._generate_curve_points(points)
 
+        kind = "Linear" if len(points) == 2 else "Piecewise"
         # Set attributes for charting
         self._attr_extra_state_attributes = {
             "min_temp": min_temp,
@@ -546,40 +928,20 @@ class UNASFanCurveVisualizationSensor(CoordinatorEntity, SensorEntity):
             "max_fan_pwm": max_fan,
             "min_fan_percent": min_fan_pct,
             "max_fan_percent": max_fan_pct,
+            "points": [[temp, pwm_to_percent(pwm)] for temp, pwm in points],
             "curve_points": curve_points,
-            "curve_formula": f"Linear: {min_temp}°C→{min_fan_pct}%, {max_temp}°C→{max_fan_pct}%",
+            "curve_formula": f"{kind}: " + ", ".join(
+                f"{temp}°C→{pwm_to_percent(pwm)}%" for temp, pwm in points),
         }
 
-    def _generate_curve_points(
-            self, min_temp: float, max_temp: float, min_fan: float, max_fan: float
-    ) -> list:
-        points = []
-
+    def _generate_curve_points(self, points: list[tuple[int, int]]) -> list:
         # Generate points from 30°C to 60°C
-        for temp in range(30, 61):
-            if temp < min_temp:
-                fan_pwm = min_fan
-            elif temp > max_temp:
-                fan_pwm = max_fan
-            else:
-                fan_pwm = min_fan + (temp - min_temp) * (max_fan - min_fan) / (
-                        max_temp - min_temp
-                )
-
-            fan_percent = round((fan_pwm * 100) / 255)
-            points.append([temp, fan_percent])
-
-        return points
+        return [[temp, pwm_to_percent(curve_pwm(points, temp))] for temp in range(30, 61)]
 
     @property
     def available(self) -> bool:
         mqtt_data = self.coordinator.data.get("mqtt_data", {})
-        return (
-                "fan_curve_min_temp" in mqtt_data
-                and "fan_curve_max_temp" in mqtt_data
-                and "fan_curve_min_fan" in mqtt_data
-                and "fan_curve_max_fan" in mqtt_data
-        )
+        return get_curve(mqtt_data) is not None
 
 
 class UNASNVMeSensor(CoordinatorEntity, SensorEntity):
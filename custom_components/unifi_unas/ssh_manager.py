@@ -71,7 +71,8 @@ class SSHManager:
 
     async def scripts_installed(self) -> bool:
         stdout, _ = await self.execute_command(
-            "test -f /root/unas_monitor.py && test -f /root/fan_control.sh && echo 'yes' || echo 'no'"
+            "test -f /root/unas_monitor.py && test -f /root/fan_control.py"
+            " && echo 'yes' || echo 'no'"
         )
         installed = stdout.strip() == "yes"
         _LOGGER.debug("Scripts installed: %s", installed)
@@ -94,8 +95,7 @@ class SSHManager:
         }
 
         for key, value in replacements.items():
-            script = script.replace(f'{key} = "REPLACE_ME"', f'{key} = "{value}"') # fan_control.sh
-            script = script.replace(f'{key}="REPLACE_ME"', f'{key}="{value}"') # unas_monitor.py
+            script = script.replace(f'{key} = "REPLACE_ME"', f'{key} = "{value}"')
 
         return script
 
@@ -108,7 +108,7 @@ class SSHManager:
                 monitor_script = await f.read()
             async with aiofiles.open(SCRIPTS_DIR / "unas_monitor.service", "r") as f:
                 monitor_service = await f.read()
-            async with aiofiles.open(SCRIPTS_DIR / "fan_control.sh", "r") as f:
+            async with aiofiles.open(SCRIPTS_DIR / "fan_control.py", "r") as f:
                 fan_control_script = await f.read()
             async with aiofiles.open(SCRIPTS_DIR / "fan_control.service", "r") as f:
                 fan_control_service = await f.read()
@@ -121,7 +121,9 @@ class SSHManager:
 
             await self._upload_file("/root/unas_monitor.py", monitor_script, executable=True)
             await self._upload_file("/etc/systemd/system/unas_monitor.service", monitor_service)
-            await self._upload_file("/root/fan_control.sh", fan_control_script, executable=True)
+            await self._upload_file("/root/fan_control.py", fan_control_script, executable=True)
+            # replaced by fan_control.py
+            await self.execute_command("rm -f /root/fan_control.sh")
             await self._upload_file("/etc/systemd/system/fan_control.service", fan_control_service)
 
             await self.execute_command("apt-get update && apt-get install -y mosquitto-clients python3-pip")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components.text import TextEntity, TextMode
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import UNASDataUpdateCoordinator
+from .const import CONF_DEVICE_MODEL, DOMAIN, get_device_info, get_mqtt_topics
+from .fan_curve import (
+    async_publish_class_curve,
+    async_publish_curve,
+    format_curve_text,
+    get_class_curve,
+    get_curve,
+    parse_curve_text,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    coordinator: UNASDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    async_add_entities([
+        UNASFanCurvePointsText(coordinator, hass),
+        UNASFanClassCurveText(coordinator, hass, "nvme", "NVMe Fan Curve Points"),
+        UNASFanClassCurveText(coordinator, hass, "cpu", "CPU Fan Curve Points"),
+    ])
+
+
+class UNASFanCurvePointsText(CoordinatorEntity, TextEntity):
+    # the whole custom curve as "temp:percent, temp:percent, ...",
+    # e.g. "35:20, 42:40, 46:70, 50:100"
+    def __init__(self, coordinator: UNASDataUpdateCoordinator, hass: HomeAssistant) -> None:
+        super().__init__(coordinator)
+        self.hass = hass
+        self._topics = get_mqtt_topics(coordinator.entry.entry_id)
+        self._attr_has_entity_name = True
+        self._attr_name = "Fan Curve Points"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_fan_curve_points"
+        self._attr_icon = "mdi:chart-bell-curve-cumulative"
+        self._attr_mode = TextMode.TEXT
+        self._attr_native_max = 255
+
+        device_name, device_model = get_device_info(coordinator.entry.data[CONF_DEVICE_MODEL])
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.entry.entry_id)},
+            name=device_name,
+            manufacturer="Ubiquiti",
+            model=device_model,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> str | None:
+        points = get_curve(self.coordinator.data.get("mqtt_data", {}))
+        return format_curve_text(points) if points is not None else None
+
+    @property
+    def available(self) -> bool:
+        mqtt_available = self.coordinator.mqtt_client.is_available()
+        service_running = self.coordinator.data.get("fan_control_running", False)
+        return mqtt_available and service_running and self.native_value is not None
+
+    async def async_set_value(self, value: str) -> None:
+        points = parse_curve_text(value)
+        await async_publish_curve(self.hass, self._topics["control"], points)
+
+
+class UNASFanClassCurveText(CoordinatorEntity, TextEntity):
+    # NVMe/CPU curve of the "weighted" fan policy, same "temp:percent, ..." format
+    def __init__(
+        self,
+        coordinator: UNASDataUpdateCoordinator,
+        hass: HomeAssistant,
+        fan_class: str,
+        name: str,
+    ) -> None:
+        super().__init__(coordinator)
+        self.hass = hass
+        self._fan_class = fan_class
+        self._topics = get_mqtt_topics(coordinator.entry.entry_id)
+        self._attr_has_entity_name = True
+        self._attr_name = name
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_fan_curve_{fan_class}_points"
+        self._attr_icon = "mdi:chart-bell-curve-cumulative"
+        self._attr_mode = TextMode.TEXT
+        self._attr_native_max = 255
+
+        device_name, device_model = get_device_info(coordinator.entry.data[CONF_DEVICE_MODEL])
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.entry.entry_id)},
+            name=device_name,
+            manufacturer="Ubiquiti",
+            model=device_model,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> str | None:
+        mqtt_data = self.coordinator.data.get("mqtt_data", {})
+        return format_curve_text(get_class_curve(mqtt_data, self._fan_class))
+
+    @property
+    def available(self) -> bool:
+        mqtt_available = self.coordinator.mqtt_client.is_available()
+        service_running = self.coordinator.data.get("fan_control_running", False)
+        return mqtt_available and service_running
+
+    async def async_set_value(self, value: str) -> None:
+        points = parse_curve_text(value)
+        await async_publish_class_curve(self.hass, self._topics["control"], self._fan_class, points)